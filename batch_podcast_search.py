@@ -1,13 +1,19 @@
-import os
-import time
-import json
-from datetime import datetime
-from dotenv import load_dotenv
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from rate_limiter import TokenBucket, call_with_backoff
+from response_cache import ResponseCache, add_cache_arguments, cache_mode
+from podcast_filters import FilterPipeline, latest_release_date, print_rejections
+from jsonl_io import COMPRESSIONS, JsonlWriter, output_path, reopen
+from checkpoint import CrawlJournal
+from catalog import DEFAULT_PATH as CATALOG_PATH, ShowCatalog
+from metrics import Metrics, add_metrics_arguments
+from pagination import MAX_OFFSET, PAGE_SIZE, PaginationReport, pages_left
+from render import add_render_arguments, make_output
+from spotify_client import create_client
+from delta import DEFAULT_PATH as FINGERPRINTS_PATH, FingerprintStore, print_changes
+from term_scheduler import TermScheduler, print_yield
 
 # --- CONFIGURATION ---
 
@@ -51,146 +57,328 @@ filters = {
     "only_questions": True,
     "last_episode_after": "2025-03-30",
     "last_episode_before": "2025-04-01",
-    "market": "FR",
+    "market": "FR",           # un marché ou une liste : ["FR", "US", "ES", "DE"]
     "episodes_to_show": 3
 }
 
-# --- INIT ---
+harvest = {
+    "workers": 8,     # threads de collecte
+    "rate": 10.0,     # requêtes/s partagées par tous les workers
+    "burst": 10,      # rafale maximale autorisée par le seau à jetons
+    # Règle « rendement » désactivée par défaut : ce qui est « nouveau » dépend du thread qui voit
+    # un podcast en premier, et la sortie varierait d’une collecte identique à l’autre
+    "min_new_ratio": 0.0,     # part minimale de podcasts nouveaux par page de recherche...
+    "low_yield_patience": 2,  # ...sur ce nombre de pages consécutives avant d’abandonner le terme
+    "budget": None,   # requêtes de recherche au plus (None : pas de limite)
+    "mine_terms": 0   # termes supplémentaires extraits des titres retenus (0 : désactivé)
+}
 
-load_dotenv()
-sp = spotipy.Spotify(
-    auth_manager=SpotifyClientCredentials(
-        client_id=os.getenv("SPOTIFY_CLIENT_ID"),
-        client_secret=os.getenv("SPOTIFY_CLIENT_SECRET")
-    )
-)
+# --- INIT ---
 
-console = Console()
-raw_results = []
-filtered_results = []
+metrics = Metrics()
+pipeline = FilterPipeline(filters)
 
 # --- OUTILS ---
 
-def parse_date(date_str):
-    try:
-        return datetime.strptime(date_str, "%Y-%m-%d")
-    except:
-        return None
-
-def get_last_episode_date(episodes):
-    dates = [ep.get("release_date") for ep in episodes if ep.get("release_date")]
-    if not dates:
-        return None
-    return max(dates)
-
-def match_filters(show, filters, episodes, last_episode_date):
-    title = show['name'].lower()
-    description = show['description'].lower()
-    languages = [l.lower() for l in show.get("languages", [])]
-    total_eps = show.get("total_episodes", 0)
-    is_explicit = show.get("explicit", None)
-
-    if filters["title_include"] and not any(kw in title for kw in filters["title_include"]):
-        return False
-    if filters["title_exclude"] and any(kw in title for kw in filters["title_exclude"]):
-        return False
-    if filters["desc_include"] and not any(kw in description for kw in filters["desc_include"]):
-        return False
-    if filters["desc_exclude"] and any(kw in description for kw in filters["desc_exclude"]):
-        return False
-    if filters["lang"] and not any(lang in languages for lang in filters["lang"]):
-        return False
-    if filters["explicit"] is not None and is_explicit != filters["explicit"]:
-        return False
-    if filters["min_episodes"] and total_eps < filters["min_episodes"]:
-        return False
-    if filters["max_episodes"] and total_eps > filters["max_episodes"]:
-        return False
-    if filters.get("only_questions") and not title.strip().endswith("?"):
-        return False
-
-    if filters.get("last_episode_after"):
-        min_date = parse_date(filters["last_episode_after"])
-        if not last_episode_date or parse_date(last_episode_date) < min_date:
-            return False
-    if filters.get("last_episode_before"):
-        max_date = parse_date(filters["last_episode_before"])
-        if not last_episode_date or parse_date(last_episode_date) > max_date:
-            return False
-
-    return True
-
 def fetch_episodes(show_id, max_episodes):
     try:
-        results = sp.show_episodes(show_id, limit=max_episodes)
+        results = cache.fetch(
+            "show_episodes", {"id": show_id, "limit": max_episodes},
+            lambda: call_with_backoff(limiter, sp.show_episodes, show_id, limit=max_episodes)
+        )
         episodes = results.get("items", [])
         return [ep for ep in episodes if ep.get("name") and ep.get("release_date")]
     except Exception as e:
-        console.log(f"[red]Erreur pour les épisodes de {show_id} : {e}[/red]")
+        console.error(f"[red]Erreur pour les épisodes de {show_id} : {e}[/red]")
         return []
 
-def show_podcast(show, episodes):
-    last_date = get_last_episode_date(episodes)
-    description = show['description'][:200] + "..."
-    panel = Panel.fit(
-        f"[bold yellow]{show['name']}[/bold yellow]\n"
-        f"[green]Publisher:[/green] {show['publisher']}\n"
-        f"[cyan]Langues:[/cyan] {', '.join(show.get('languages', []))}\n"
-        f"[cyan]Episodes:[/cyan] {show['total_episodes']} | Explicite: {show['explicit']}\n"
-        f"[cyan]Dernier épisode :[/cyan] {last_date or 'N/A'}\n\n"
-        f"{description}\n\n"
-        f"[blue]{show['external_urls']['spotify']}[/blue]",
-        title="🎙️ Podcast",
-        border_style="magenta"
-    )
-    console.print(panel)
-
 # --- TRAITEMENT ---
 
 seen_ids = set()
+seen_markets = {}
+seen_lock = threading.Lock()
+
+def claim(show_id, market):
+    # Dédoublonnage tous marchés confondus : un podcast n’est enrichi qu’une fois
+    with seen_lock:
+        show_markets = seen_markets.setdefault(show_id, set())
+        if market not in show_markets:
+            show_markets.add(market)
+            # Journalisé avec la page : une reprise retrouve tous les marchés déjà vus
+            journal.market_seen(show_id, market)
+        if show_id in seen_ids:
+            return False
+        seen_ids.add(show_id)
+        return True
+
+def process_show(show):
+    # Les résultats de recherche contiennent déjà les métadonnées du podcast
+    with metrics.timed("filter.metadata"):
+        if not pipeline.match_metadata(show):
+            if fingerprints:
+                fingerprints.record(show, matched=False)
+            return
+
+    # En mode --delta, un podcast dont l’empreinte n’a pas changé garde ses épisodes
+    previous = fingerprints.lookup(show) if fingerprints else None
+    if previous:
+        episodes, last_date = previous
+        fingerprints.count("reused")
+    else:
+        with metrics.timed("stage.episodes"):
+            episodes = fetch_episodes(show['id'], filters["episodes_to_show"])
+        last_date = latest_release_date(episodes)
+        if fingerprints:
+            fingerprints.count("fetched")
+    if catalog:
+        with metrics.timed("catalog.upsert"):
+            catalog.upsert(show, episodes, last_date)
+
+    with metrics.timed("filter.episodes"):
+        matched = pipeline.match_episodes(last_date)
+    if fingerprints:
+        fingerprints.record(show, matched, episodes, last_date)
+    if matched:
+        with metrics.timed("render"):
+            console.podcast(show, last_date)
+        filtered_writer.write({"show": show, "episodes": episodes})
+    return matched
+
+def track_page(term, offset, futures):
+    # La page n’est journalisée qu’une fois tous ses podcasts évalués
+    if not futures:
+        journal.page_done(term, offset)
+        return
+    remaining = [len(futures)]
+    lock = threading.Lock()
 
-for term in search_terms:
-    console.rule(f"[bold green]🔍 Recherche : {term}[/bold green]")
+    def done(future):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            journal.page_done(term, offset)
 
-    for offset in range(0, 1000, 50):
-        try:
-            results = sp.search(q=term, type='show', limit=50, offset=offset, market=filters["market"])
-            shows = results.get('shows', {}).get('items', [])
-            if not shows:
-                break
+    for future in futures:
+        future.add_done_callback(done)
 
-            raw_results.extend(shows)
+def evaluate_show(show, state):
+    try:
+        if process_show(show):
+            # Podcast retenu : crédité au terme qui l’a trouvé, ses mots peuvent devenir des termes
+            for term in scheduler.matched(state, show.get("name", "")):
+                journal.term_mined(term)
+                console.log(f"[cyan]Nouveau terme extrait des titres : {term}[/cyan]")
+        journal.show_done(show['id'])
+    finally:
+        scheduler.evaluation_done()
+
+def journal_key(market, term):
+    # Un seul marché : mêmes clés que les journaux existants
+    return term if len(markets) == 1 else f"{term}@{market}"
+
+def crawl_page(state, show_pool):
+    market, term, key, offset = state.market, state.term, state.key, state.offset
+    label = term if len(markets) == 1 else f"{term} ({market})"
+    if offset == 0:
+        console.rule(f"[bold green]🔍 Recherche : {label}[/bold green]")
+    try:
+        params = {"q": term, "type": "show", "limit": PAGE_SIZE, "offset": offset, "market": market}
+        with metrics.timed("stage.search_page"):
+            results = cache.fetch("search", params, lambda: call_with_backoff(limiter, sp.search, **params))
+        shows = results.get('shows', {}).get('items', [])
+        if not shows:
+            pagination.record("page_vide")
+            journal.term_done(key, offset)
+            scheduler.page_done(state, 0, "page_vide", offset)
+            return []
+
+        page_futures = []
+        candidates = 0
+        for show in shows:
+            is_new = claim(show['id'], market)
+            if catalog:
+                catalog.add_market(show['id'], market)
+            if is_new:
+                raw_writer.write(show)
+                if catalog:
+                    with metrics.timed("catalog.upsert"):
+                        catalog.upsert(show)
+                # Rendement immédiat de la page : les épisodes ne sont connus que plus tard
+                if pipeline.passes_metadata(show):
+                    candidates += 1
+                # Compté avant la fin de la page : le planificateur attend ces évaluations
+                scheduler.evaluation_started()
+                page_futures.append(show_pool.submit(evaluate_show, show, state))
+        track_page(key, offset, page_futures)
+
+        rule = state.pager.stop_rule(results, offset, len(page_futures))
+        total = results['shows'].get('total', MAX_OFFSET)
+        if rule:
+            pagination.record(rule, pages_left(offset + PAGE_SIZE, total))
+            journal.term_done(key, offset + PAGE_SIZE)
+        scheduler.page_done(state, candidates, rule, total)
+        return page_futures
+
+    except Exception as e:
+        console.error(f"[red]Erreur à l’offset {offset} pour '{label}' : {e}[/red]")
+        scheduler.page_failed(state)
+        return []
+
+def crawl_worker(show_pool):
+    # Chaque worker prend la page la plus prometteuse du moment jusqu’à épuisement
+    pending = []
+    while True:
+        state = scheduler.next_page()
+        if state is None:
+            return pending
+        pending.extend(crawl_page(state, show_pool))
+
+def run(workers):
+    # Une seule file de pages pour toutes les paires (marché, terme), servies par rendement
+    # récent ; à rendement égal, marchés d’un même terme côte à côte : les doublons entre
+    # marchés sont écartés avant tout enrichissement
+    with ThreadPoolExecutor(max_workers=workers) as show_pool, \
+            ThreadPoolExecutor(max_workers=workers) as term_pool:
+        term_futures = [term_pool.submit(crawl_worker, show_pool) for _ in range(workers)]
+        for future in as_completed(term_futures):
+            for show_future in future.result():
+                show_future.result()
+    # Termes interrompus par --budget : pages que la pagination aurait encore demandées
+    for state in scheduler.exhausted():
+        pagination.record("budget", pages_left(state.offset, state.total))
+
+def print_markets(output, markets, seen_markets):
+    seen = Counter()
+    only = Counter()
+    for show_markets in seen_markets.values():
+        for market in show_markets:
+            seen[market] += 1
+        if len(show_markets) == 1:
+            only[next(iter(show_markets))] += 1
+    columns = [("Marché", "left"), ("Podcasts vus", "right"), ("Vus uniquement ici", "right")]
+    rows = [[market, seen[market], only[market]] for market in markets]
+    caption = f"{len(seen_markets)} podcasts uniques, enrichis une seule fois"
+    output.table("Podcasts par marché", columns, rows, caption)
 
-            for show in shows:
-                if show['id'] in seen_ids:
-                    continue
+parser = argparse.ArgumentParser(description="Collecte des podcasts Spotify par termes de recherche")
+parser.add_argument("--workers", type=int, default=harvest["workers"], help="Nombre de threads de collecte")
+parser.add_argument("--rate", type=float, default=harvest["rate"], help="Requêtes par seconde (toutes threads confondues)")
+parser.add_argument("--min-new-ratio", type=float, default=harvest["min_new_ratio"],
+                    help="Abandonne un terme quand la part de podcasts nouveaux reste sous ce seuil "
+                         "(par défaut : 0, désactivé ; résultats non reproductibles d’une collecte à l’autre)")
+parser.add_argument("--budget", type=int, default=harvest["budget"],
+                    help="Nombre maximal de requêtes de recherche, réparties selon le rendement des termes")
+parser.add_argument("--mine-terms", type=int, default=harvest["mine_terms"],
+                    help="Ajoute jusqu’à N termes tirés des mots fréquents des titres retenus")
+parser.add_argument("--markets", nargs="+", help="Marchés à parcourir (par défaut : filters[\"market\"])")
+parser.add_argument("--compress", choices=list(COMPRESSIONS), default="none", help="Compression des fichiers JSONL")
+parser.add_argument("--catalog", default=CATALOG_PATH, help="Catalogue SQLite mis à jour pendant la collecte")
+parser.add_argument("--no-catalog", action="store_true", help="Ne met pas à jour le catalogue local")
+parser.add_argument("--delta", action="store_true",
+                    help="Ne récupère les épisodes que des podcasts nouveaux ou modifiés depuis la collecte précédente")
+parser.add_argument("--fingerprints", default=FINGERPRINTS_PATH, help="Empreintes de la collecte précédente (mode --delta)")
+parser.add_argument("--resume", action="store_true", help="Reprend la collecte interrompue là où elle s’est arrêtée")
+add_cache_arguments(parser)
+add_metrics_arguments(parser, "batch_metrics.json")
+add_render_arguments(parser)
+args = parser.parse_args()
 
-                episodes = fetch_episodes(show['id'], filters["episodes_to_show"])
-                last_date = get_last_episode_date(episodes)
+markets = args.markets or filters["market"]
+if isinstance(markets, str):
+    markets = [markets]
+markets = list(dict.fromkeys(market.upper() for market in markets))
 
-                if match_filters(show, filters, episodes, last_date):
-                    show_podcast(show, episodes)
-                    filtered_results.append({
-                        "show": show,
-                        "episodes": episodes
-                    })
-                    seen_ids.add(show['id'])
+# Affichage différé (file bornée) ou sans rich du tout avec --quiet/--json
+console = make_output(args)
 
-                time.sleep(0.2)  # Évite le throttling
+# Une connexion par thread (recherche + podcasts) ; les 429 remontent au limiteur
+sp = create_client(metrics, pool_size=2 * max(1, args.workers))
 
-        except Exception as e:
-            console.print(f"[red]Erreur à l’offset {offset} pour '{term}' : {e}[/red]")
-            break
+limiter = TokenBucket(args.rate, harvest["burst"])
+cache = ResponseCache(args.cache_path, mode=cache_mode(args))
+catalog = None if args.no_catalog else ShowCatalog(args.catalog)
+fingerprints = FingerprintStore(args.fingerprints) if args.delta else None
+pagination = PaginationReport()
 
-# --- EXPORT FINAL ---
+# Écriture au fil de l’eau : un arrêt brutal ne perd que les dernières lignes non synchronisées
+raw_path = output_path("raw_results", args.compress)
+filtered_path = output_path("filtered_results", args.compress)
+changes_path = "delta_changes.jsonl"
+markets_path = output_path("show_markets", args.compress)
+open_writer = reopen if args.resume else JsonlWriter
+raw_writer = open_writer(raw_path, key=lambda show: show["id"])
+filtered_writer = open_writer(filtered_path, key=lambda entry: entry["show"]["id"])
 
-with open("raw_results.json", "w", encoding="utf-8") as f:
-    json.dump(raw_results, f, ensure_ascii=False, indent=2)
+# Les podcasts déjà évalués lors de la collecte interrompue ne sont pas refaits
+journal = CrawlJournal(resume=args.resume, writers=(raw_writer, filtered_writer))
+seen_ids.update(journal.shows)
+for show_id, show_markets in journal.markets.items():
+    seen_markets[show_id] = set(show_markets)
+if args.resume:
+    console.print(f"[yellow]{journal.summary()}[/yellow]")
 
-with open("filtered_results.json", "w", encoding="utf-8") as f:
-    json.dump(filtered_results, f, ensure_ascii=False, indent=2)
+scheduler = TermScheduler(
+    markets, search_terms, journal, journal_key, args.min_new_ratio, harvest["low_yield_patience"],
+    budget=args.budget, mine_terms=args.mine_terms
+)
+# Les termes extraits avant l’interruption sont repris avec le reste
+for term in journal.mined:
+    scheduler.add_mined(term)
+
+try:
+    with metrics.timed("stage.crawl"):
+        run(max(1, args.workers))
+finally:
+    journal.close()
+    raw_writer.close()
+    filtered_writer.close()
+    # Un enregistrement par podcast avec l’ensemble des marchés où il a été vu, même avec
+    # un seul marché : l’export en colonnes en tire la colonne `market`
+    with JsonlWriter(markets_path) as markets_writer:
+        for show_id, show_markets in seen_markets.items():
+            markets_writer.write({"id": show_id, "markets": sorted(show_markets)})
+    console.flush()
 
-console.rule(f"[bold blue]✅ Total podcasts filtrés : {len(filtered_results)}[/bold blue]")
+# --- BILAN ---
+
+print_rejections(console, pipeline)
+pagination.print(console)
+print_yield(console, scheduler)
+if len(markets) > 1:
+    print_markets(console, markets, seen_markets)
+if fingerprints:
+    new_matches, lost_matches = fingerprints.changes()
+    with JsonlWriter(changes_path) as changes_writer:
+        for change in new_matches + lost_matches:
+            changes_writer.write(change)
+    print_changes(console, fingerprints, new_matches, lost_matches)
+    # Aperçu : la liste complète est dans changes_path
+    for change in new_matches[:20]:
+        console.print(f"[green]+ {change['name']}[/green] ({change['id']})")
+    for change in lost_matches[:20]:
+        console.print(f"[red]- {change['name']}[/red] ({change['id']})")
+    for name, value in fingerprints.stats.items():
+        metrics.gauge(f"delta.{name}", value)
+    fingerprints.close()
+console.rule(f"[bold blue]✅ Total podcasts filtrés : {filtered_writer.count}[/bold blue]")
 console.print("[green]Résultats exportés dans :[/green]")
-console.print(" - [blue]raw_results.json[/blue]")
-console.print(" - [blue]filtered_results.json[/blue]")
+console.print(f" - [blue]{raw_path}[/blue] ({raw_writer.count} podcasts uniques)")
+console.print(f" - [blue]{filtered_path}[/blue] ({filtered_writer.count} podcasts filtrés)")
+console.print(f" - [blue]{markets_path}[/blue] (marchés de chaque podcast)")
+if fingerprints:
+    console.print(f" - [blue]{changes_path}[/blue] ({len(new_matches)} nouveaux, {len(lost_matches)} retirés)")
+if catalog:
+    console.print(f" - [blue]{catalog.path}[/blue] ({catalog.count()} podcasts au catalogue)")
+    catalog.close()
+console.print(f"[dim]{cache.summary()}[/dim]")
+cache.close()
+
+metrics.gauge("limiter.wait_seconds", limiter.waited)
+metrics.gauge("limiter.retries_429", limiter.backoffs)
+for name, value in cache.stats.items():
+    metrics.gauge(f"cache.{name}", value)
+metrics.print(console)
+metrics.write(args.metrics)
+console.print(f"[green]Mesures exportées dans :[/green] [blue]{args.metrics}[/blue]")
+console.close()
@@ -0,0 +1,52 @@
+import os
+import sys
+import json
+import time
+import atexit
+import runpy
+import resource
+
+# --- LANCEUR D’UN SCRIPT AVEC LE FAUX CLIENT SPOTIFY ---
+#
+# python benchmarks/fake_run.py batch_podcast_search.py [OPTIONS...]
+# Configuration du faux client : variable BENCH_FAKE (JSON) ;
+# statistiques écrites en JSON dans le fichier BENCH_STATS à la fin du script.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import spotify_client
+from fake_spotify import FakeCatalog, FakeSpotify
+
+config = json.loads(os.environ.get("BENCH_FAKE", "{}"))
+fake = FakeSpotify(
+    FakeCatalog(config.get("catalog_size", 10000), seed=config.get("seed", 0)),
+    latency=config.get("latency", 0.0),
+    jitter=config.get("jitter", 0.0),
+    error_rate=config.get("error_rate", 0.0),
+    retry_after=config.get("retry_after", 1),
+    replay=config.get("replay"),
+    seed=config.get("seed", 0),
+)
+spotify_client.connect = lambda **kwargs: fake.configure(**kwargs)
+
+started = time.perf_counter()
+
+def report():
+    stats_path = os.environ.get("BENCH_STATS")
+    if not stats_path:
+        return
+    with open(stats_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "wall_seconds": time.perf_counter() - started,
+            "calls": dict(fake.calls),
+            # ru_maxrss : kilo-octets sous Linux
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }, f)
+
+atexit.register(report)
+
+script = sys.argv[1]
+sys.argv = sys.argv[1:]
+runpy.run_path(os.path.join(ROOT, script), run_name="__main__")
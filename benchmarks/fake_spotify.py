@@ -0,0 +1,181 @@
+import json
+import time
+import zlib
+import random
+import sqlite3
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from spotipy.exceptions import SpotifyException
+from response_cache import cache_key
+from spotify_client import make_session
+
+# --- FAUX CLIENT SPOTIFY POUR LES BENCHMARKS ---
+#
+# Remplace le client spotipy (search, show_episodes, shows) sans réseau :
+# - catalogue synthétique déterministe de taille quelconque (généré à la demande),
+# - rejeu optionnel des réponses enregistrées dans le cache SQLite (response_cache),
+# - latence et injection de 429 (avec Retry-After) configurables ; la décision de réessayer
+#   un 429 en interne est celle de la politique de réessai de la vraie session
+#   (spotify_client.make_session), appliquée au statut et à l’en-tête Retry-After simulés.
+
+# Valeurs par défaut de spotipy.Spotify
+DEFAULT_STATUS_FORCELIST = (429, 500, 502, 503, 504)
+DEFAULT_STATUS_RETRIES = 3
+
+WORDS = [
+    "how", "what", "why", "wine", "vin", "story", "daily", "secret", "talk", "mind",
+    "money", "crime", "history", "science", "ready", "dare", "happen", "guess", "club", "life"
+]
+LANGUAGES = [["en"], ["en"], ["fr"], ["es"], ["de"], ["en", "fr"]]
+FIRST_DAY = date(2024, 1, 1)
+
+
+def show_id(index):
+    return f"fake{index:018d}"
+
+
+def show_index(spotify_id):
+    return int(spotify_id[4:])
+
+
+class FakeCatalog:
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.seed = seed
+
+    def _rng(self, index):
+        return random.Random(self.seed * 1_000_003 + index)
+
+    def show(self, index):
+        rng = self._rng(index)
+        name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {index}"
+        if rng.random() < 0.3:
+            name += "?"
+        return {
+            "id": show_id(index),
+            "name": name,
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))),
+            "publisher": f"Publisher {index % 997}",
+            "languages": rng.choice(LANGUAGES),
+            "explicit": rng.random() < 0.5,
+            "total_episodes": int(rng.expovariate(1 / 20)) + 1,
+            "media_type": "audio",
+            "type": "show",
+            "uri": f"spotify:show:{show_id(index)}",
+            "images": [{"url": f"https://i.example/{index}.jpg", "height": 640, "width": 640}],
+            "external_urls": {"spotify": f"https://open.spotify.com/show/{show_id(index)}"},
+        }
+
+    def last_release(self, index):
+        return FIRST_DAY + timedelta(days=self._rng(index + 7).randint(0, 500))
+
+    def episodes(self, index, limit):
+        total = self.show(index)["total_episodes"]
+        last = self.last_release(index)
+        return [
+            {
+                "id": f"{show_id(index)}e{k}",
+                "name": f"Episode {total - k}",
+                "release_date": (last - timedelta(days=7 * k)).isoformat(),
+                "release_date_precision": "day",
+            }
+            for k in range(min(limit, total))
+        ]
+
+    def search(self, q, offset, limit, market=None):
+        # Résultats stables par terme ; les termes se recouvrent comme sur la vraie API,
+        # et un même terme donne des résultats décalés (en partie communs) selon le marché
+        h = zlib.crc32(q.encode("utf-8"))
+        total = min(self.size, 200 + h % 5000)
+        stride = 1 + h % 7
+        shift = zlib.crc32(market.encode("utf-8")) % 200 if market else 0
+        count = max(0, min(limit, total - offset))
+        return [(h + (shift + offset + k) * stride) % self.size for k in range(count)], total
+
+
+class FakeSpotify:
+    def __init__(self, catalog, latency=0.0, jitter=0.0, error_rate=0.0, retry_after=1, replay=None, seed=0):
+        self.catalog = catalog
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.configure()
+        self.replay = None
+        if replay:
+            self.replay = sqlite3.connect(f"file:{replay}?mode=ro", uri=True, check_same_thread=False)
+
+    def configure(self, status_forcelist=DEFAULT_STATUS_FORCELIST, status_retries=DEFAULT_STATUS_RETRIES, **kwargs):
+        # Reçoit les arguments passés à spotify_client.connect(...) par le script mesuré
+        self.status_retries = status_retries
+        session = make_session(status_forcelist=status_forcelist, status_retries=status_retries)
+        self.retry = session.get_adapter("https://").max_retries
+        session.close()
+        return self
+
+    def _request(self, endpoint):
+        for attempt in range(self.status_retries + 1):
+            with self.lock:
+                self.calls[endpoint] += 1
+                throttled = self.rng.random() < self.error_rate
+                delay = self.latency + self.rng.uniform(0, self.jitter)
+            if delay:
+                time.sleep(delay)
+            if not throttled:
+                return
+            with self.lock:
+                self.calls["429"] += 1
+            retried = self.retry.is_retry("GET", 429, has_retry_after=True)
+            if not retried or attempt == self.status_retries:
+                raise SpotifyException(
+                    429, -1, "API rate limit exceeded",
+                    headers={"Retry-After": str(self.retry_after)}
+                )
+            # Réessai interne d’urllib3, qui respecte Retry-After
+            time.sleep(self.retry_after)
+
+    def _replayed(self, endpoint, params):
+        if self.replay is None:
+            return None
+        with self.lock:
+            row = self.replay.execute(
+                "SELECT payload FROM responses WHERE key = ?", (cache_key(endpoint, params),)
+            ).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def search(self, q, limit=10, offset=0, type="track", market=None):
+        self._request("search")
+        params = {"q": q, "type": type, "limit": limit, "offset": offset, "market": market}
+        replayed = self._replayed("search", params)
+        if replayed is not None:
+            return replayed
+        indices, total = self.catalog.search(q, offset, limit, market)
+        next_offset = offset + limit
+        return {"shows": {
+            "items": [self.catalog.show(i) for i in indices],
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "next": f"search?offset={next_offset}" if next_offset < min(total, 1000) else None,
+        }}
+
+    def show_episodes(self, show_id, limit=50, offset=0, market=None):
+        self._request("show_episodes")
+        replayed = self._replayed("show_episodes", {"id": show_id, "limit": limit})
+        if replayed is not None:
+            return replayed
+        return {"items": self.catalog.episodes(show_index(show_id), limit), "limit": limit, "offset": offset}
+
+    def shows(self, shows, market=None):
+        self._request("shows")
+        result = []
+        for spotify_id in shows:
+            replayed = self._replayed("show", {"id": spotify_id, "market": market})
+            if replayed is None and spotify_id.startswith("fake"):
+                replayed = self.catalog.show(show_index(spotify_id))
+            result.append(replayed)
+        return {"shows": result}
@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+# --- BENCHMARKS HORS LIGNE ---
+#
+# python benchmarks/run_benchmarks.py [--catalog-size 100000] [--latency 0.02] [--error-rate 0.01]
+#
+# Chaque benchmark tourne dans un sous-processus et un répertoire temporaire (cache froid),
+# avec le faux client Spotify : temps réel, requêtes émises, pic de mémoire résidente, podcasts/s.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(0, ROOT)
+
+from rich.console import Console
+from rich.table import Table
+from fake_spotify import FakeCatalog
+from jsonl_io import JsonlWriter, iter_records
+
+BENCHMARKS = ("crawl", "refilter_raw", "refilter_filtered")
+
+
+def write_raw(path, catalog, size):
+    with JsonlWriter(path) as writer:
+        for index in range(size):
+            writer.write(catalog.show(index % catalog.size))
+
+
+def write_filtered(path, catalog, size):
+    with JsonlWriter(path) as writer:
+        for index in range(size):
+            i = index % catalog.size
+            writer.write({"show": catalog.show(i), "episodes": catalog.episodes(i, 3)})
+
+
+def count_records(path):
+    return sum(1 for _ in iter_records(path)) if os.path.exists(path) else 0
+
+
+def run_script(workdir, script, script_args, fake_config):
+    stats_path = os.path.join(workdir, "bench_stats.json")
+    env = dict(os.environ, BENCH_FAKE=json.dumps(fake_config), BENCH_STATS=stats_path)
+    with open(os.path.join(workdir, "stdout.txt"), "w", encoding="utf-8") as out:
+        subprocess.run(
+            [sys.executable, os.path.join(HERE, "fake_run.py"), script, *script_args],
+            cwd=workdir, env=env, stdout=out, stderr=subprocess.STDOUT, check=True
+        )
+    with open(stats_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def bench_crawl(workdir, args, fake_config):
+    stats = run_script(workdir, "batch_podcast_search.py", [
+        "--workers", str(args.workers), "--rate", str(args.rate), "--no-catalog"
+    ], fake_config)
+    stats["shows"] = count_records(os.path.join(workdir, "raw_results.jsonl"))
+    return stats
+
+
+def bench_refilter_raw(workdir, args, fake_config):
+    catalog = FakeCatalog(args.catalog_size, seed=args.seed)
+    write_raw(os.path.join(workdir, "raw_results.jsonl"), catalog, args.raw_size)
+    stats = run_script(workdir, "filter_raw_results.py", [], fake_config)
+    stats["shows"] = args.raw_size
+    return stats
+
+
+def bench_refilter_filtered(workdir, args, fake_config):
+    catalog = FakeCatalog(args.catalog_size, seed=args.seed)
+    write_filtered(os.path.join(workdir, "filtered_results.jsonl"), catalog, args.catalog_size)
+    stats = run_script(workdir, "filter_filtered_results.py", [], fake_config)
+    stats["shows"] = args.catalog_size
+    return stats
+
+
+def print_results(console, results, previous=None):
+    table = Table(title="Benchmarks hors ligne")
+    table.add_column("Benchmark")
+    table.add_column("Temps (s)", justify="right")
+    table.add_column("Requêtes", justify="right")
+    table.add_column("429", justify="right")
+    table.add_column("Pic RSS (Mo)", justify="right")
+    table.add_column("Podcasts/s", justify="right")
+    if previous:
+        table.add_column("Δ temps", justify="right")
+
+    for name, r in results.items():
+        requests = sum(n for endpoint, n in r["calls"].items() if endpoint != "429")
+        row = [
+            name, f"{r['wall_seconds']:.2f}", str(requests), str(r["calls"].get("429", 0)),
+            f"{r['peak_rss_kb'] / 1024:.0f}", f"{r['shows_per_second']:.0f}"
+        ]
+        if previous:
+            before = previous.get(name)
+            row.append(f"{(r['wall_seconds'] / before['wall_seconds'] - 1):+.0%}" if before else "—")
+        table.add_row(*row)
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne avec un faux client Spotify")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--catalog-size", type=int, default=10000, help="Podcasts du catalogue synthétique (10k à 1M)")
+    parser.add_argument("--raw-size", type=int, default=2000, help="Podcasts dans raw_results.jsonl pour refilter_raw")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latence simulée par requête (s)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Variation aléatoire de latence (s)")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Proportion de réponses 429")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After des 429 simulés (s)")
+    parser.add_argument("--replay", help="Cache SQLite (spotify_cache.sqlite) dont les réponses sont rejouées")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=200.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Écrit les résultats en JSON")
+    parser.add_argument("--compare", help="Résultats JSON d’une exécution précédente")
+    args = parser.parse_args()
+
+    fake_config = {
+        "catalog_size": args.catalog_size,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "retry_after": args.retry_after,
+        "replay": os.path.abspath(args.replay) if args.replay else None,
+        "seed": args.seed,
+    }
+    runners = {
+        "crawl": bench_crawl,
+        "refilter_raw": bench_refilter_raw,
+        "refilter_filtered": bench_refilter_filtered,
+    }
+
+    console = Console()
+    results = {}
+    for name in args.only:
+        console.log(f"Benchmark {name}...")
+        with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as workdir:
+            stats = runners[name](workdir, args, fake_config)
+        stats["shows_per_second"] = stats["shows"] / stats["wall_seconds"] if stats["wall_seconds"] else 0.0
+        results[name] = stats
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)["results"]
+    print_results(console, results, previous)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": fake_config, "results": results}, f, indent=2)
+        console.print(f"[green]Résultats exportés dans :[/green] [blue]{args.output}[/blue]")
+
+
+if __name__ == "__main__":
+    main()
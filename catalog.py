@@ -0,0 +1,232 @@
+import sys
+import json
+import time
+from jsonl_io import iter_records
+from sqlite_store import SqliteStore
+from podcast_filters import filter_day, latest_release_date, normalize_day
+
+# --- CATALOGUE LOCAL DES PODCASTS ---
+#
+# Base SQLite mise à jour par upsert à chaque collecte. Index secondaires sur la langue,
+# `explicit`, `total_episodes`, la date du dernier épisode et les titres en question ;
+# index plein texte FTS5 (trigrammes) sur `name` et `description` pour les mots-clés.
+# `show_markets` garde les marchés dans lesquels chaque podcast a été vu.
+
+DEFAULT_PATH = "podcast_catalog.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shows (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    publisher TEXT,
+    explicit INTEGER,
+    total_episodes INTEGER,
+    is_question INTEGER NOT NULL,
+    last_episode_date TEXT,
+    data TEXT NOT NULL,
+    episodes TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS show_languages (
+    show_id TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    PRIMARY KEY (lang, show_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS show_markets (
+    show_id TEXT NOT NULL,
+    market TEXT NOT NULL,
+    PRIMARY KEY (market, show_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS shows_explicit ON shows (explicit, total_episodes);
+CREATE INDEX IF NOT EXISTS shows_total_episodes ON shows (total_episodes);
+CREATE INDEX IF NOT EXISTS shows_last_episode ON shows (last_episode_date);
+CREATE INDEX IF NOT EXISTS shows_question ON shows (is_question, total_episodes);
+CREATE INDEX IF NOT EXISTS show_languages_show ON show_languages (show_id);
+CREATE INDEX IF NOT EXISTS show_markets_show ON show_markets (show_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS shows_fts USING fts5(
+    name, description, content='shows', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS shows_fts_insert AFTER INSERT ON shows BEGIN
+    INSERT INTO shows_fts (rowid, name, description) VALUES (new.rowid, new.name, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS shows_fts_delete AFTER DELETE ON shows BEGIN
+    INSERT INTO shows_fts (shows_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS shows_fts_update AFTER UPDATE OF name, description ON shows BEGIN
+    INSERT INTO shows_fts (shows_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+    INSERT INTO shows_fts (rowid, name, description) VALUES (new.rowid, new.name, new.description);
+END;
+"""
+
+UPSERT = """
+INSERT INTO shows (id, name, description, publisher, explicit, total_episodes, is_question,
+                   last_episode_date, data, episodes, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    name = excluded.name,
+    description = excluded.description,
+    publisher = excluded.publisher,
+    explicit = excluded.explicit,
+    total_episodes = excluded.total_episodes,
+    is_question = excluded.is_question,
+    last_episode_date = COALESCE(excluded.last_episode_date, shows.last_episode_date),
+    data = excluded.data,
+    episodes = COALESCE(excluded.episodes, shows.episodes),
+    updated_at = excluded.updated_at
+"""
+
+
+def fts_phrase(keyword):
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def keyword_condition(column, keywords, exclude):
+    # Trigrammes : recherche de sous-chaîne insensible à la casse, à partir de 3 caractères.
+    # Les mots-clés plus courts passent par instr() (parcours des lignes restantes).
+    keywords = [kw.lower() for kw in keywords or [] if kw]
+    if not keywords:
+        return None, []
+    long_kws = [kw for kw in keywords if len(kw) >= 3]
+    short_kws = [kw for kw in keywords if len(kw) < 3]
+    parts = []
+    params = []
+    if long_kws:
+        parts.append("shows.rowid IN (SELECT rowid FROM shows_fts WHERE shows_fts MATCH ?)")
+        params.append(f"{column} : (" + " OR ".join(fts_phrase(kw) for kw in long_kws) + ")")
+    for kw in short_kws:
+        parts.append(f"instr(lower(shows.{column}), ?) > 0")
+        params.append(kw)
+    condition = "(" + " OR ".join(parts) + ")"
+    if exclude:
+        condition = f"NOT {condition}"
+    return condition, params
+
+
+def filters_to_sql(filters, with_dates=True):
+    conditions = []
+    params = []
+
+    if filters.get("explicit") is not None:
+        conditions.append("shows.explicit = ?")
+        params.append(int(filters["explicit"]))
+    if filters.get("min_episodes"):
+        conditions.append("shows.total_episodes >= ?")
+        params.append(filters["min_episodes"])
+    if filters.get("max_episodes"):
+        conditions.append("shows.total_episodes <= ?")
+        params.append(filters["max_episodes"])
+    if filters.get("only_questions"):
+        conditions.append("shows.is_question = 1")
+    langs = sorted({lang.lower() for lang in filters.get("lang") or []})
+    if langs:
+        conditions.append(
+            "shows.id IN (SELECT show_id FROM show_languages WHERE lang IN ("
+            + ", ".join("?" * len(langs)) + "))"
+        )
+        params.extend(langs)
+
+    for key, column, exclude in (
+        ("title_include", "name", False),
+        ("title_exclude", "name", True),
+        ("desc_include", "description", False),
+        ("desc_exclude", "description", True),
+    ):
+        condition, condition_params = keyword_condition(column, filters.get(key), exclude)
+        if condition:
+            conditions.append(condition)
+            params.extend(condition_params)
+
+    if with_dates:
+        after = filter_day(filters, "last_episode_after")
+        before = filter_day(filters, "last_episode_before")
+        if after:
+            conditions.append("shows.last_episode_date >= ?")
+            params.append(after)
+        if before:
+            conditions.append("shows.last_episode_date <= ?")
+            params.append(before)
+
+    where = " AND ".join(conditions) if conditions else "1"
+    return where, params
+
+
+class ShowCatalog(SqliteStore):
+    def __init__(self, path=DEFAULT_PATH, commit_every=500):
+        super().__init__(path, SCHEMA, commit_every)
+
+    def upsert(self, show, episodes=None, last_episode_date=None):
+        last_episode_date = normalize_day(last_episode_date)
+        row = (
+            show["id"],
+            show.get("name", ""),
+            show.get("description", ""),
+            show.get("publisher"),
+            None if show.get("explicit") is None else int(show["explicit"]),
+            show.get("total_episodes", 0),
+            int(show.get("name", "").rstrip().endswith("?")),
+            last_episode_date,
+            json.dumps(show, ensure_ascii=False),
+            json.dumps(episodes, ensure_ascii=False) if episodes is not None else None,
+            time.time(),
+        )
+        langs = {lang.lower() for lang in show.get("languages", [])}
+        with self.lock:
+            self.db.execute(UPSERT, row)
+            self.db.execute("DELETE FROM show_languages WHERE show_id = ?", (show["id"],))
+            self.db.executemany(
+                "INSERT INTO show_languages (show_id, lang) VALUES (?, ?)",
+                [(show["id"], lang) for lang in langs]
+            )
+            self._written()
+
+    def add_market(self, show_id, market):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR IGNORE INTO show_markets (show_id, market) VALUES (?, ?)", (show_id, market)
+            )
+
+    def query(self, filters, with_dates=True):
+        # (show, episodes, last_episode_date) pour chaque podcast retenu par les index ;
+        # show["markets"] liste les marchés où il a été vu, s’ils sont connus
+        where, params = filters_to_sql(filters, with_dates)
+        with self.lock:
+            self.db.commit()
+            rows = self.db.execute(
+                "SELECT data, episodes, last_episode_date, "
+                "(SELECT group_concat(market) FROM show_markets WHERE show_id = shows.id) "
+                f"FROM shows WHERE {where} ORDER BY shows.rowid",
+                params
+            ).fetchall()
+        for data, episodes, last_episode_date, markets in rows:
+            show = json.loads(data)
+            if markets:
+                show["markets"] = sorted(markets.split(","))
+            yield show, json.loads(episodes) if episodes else [], last_episode_date
+
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM shows").fetchone()[0]
+
+
+def import_file(catalog, path):
+    # Accepte les podcasts bruts (raw_results) comme les entrées {"show", "episodes"}
+    count = 0
+    for record in iter_records(path):
+        if "show" in record:
+            episodes = record.get("episodes", [])
+            catalog.upsert(record["show"], episodes, latest_release_date(episodes))
+        else:
+            catalog.upsert(record, last_episode_date=record.get("last_episode_date"))
+        count += 1
+    catalog.commit()
+    return count
+
+
+if __name__ == "__main__":
+    # python catalog.py raw_results.jsonl filtered_results.jsonl ...
+    catalog = ShowCatalog()
+    for path in sys.argv[1:]:
+        print(f"{path} : {import_file(catalog, path)} podcasts importés")
+    print(f"{catalog.count()} podcasts dans {catalog.path}")
+    catalog.close()
@@ -0,0 +1,105 @@
+import os
+import json
+import threading
+from jsonl_io import decode_lines
+
+# --- JOURNAL DE REPRISE DES COLLECTES ---
+#
+# Fichier JSONL en ajout seul :
+#   {"type": "page", "term": ..., "offset": ...}  page traitée (tous ses podcasts évalués)
+#   {"type": "term", "term": ..., "end": ...}      pagination terminée (page vide à `end`)
+#   {"type": "show", "id": ...}                    podcast évalué (filtres + épisodes)
+#   {"type": "mined", "term": ...}                 terme extrait des titres retenus
+#   {"type": "market", "id": ..., "market": ...}   podcast vu dans un marché
+#
+# Les podcasts évalués et les marchés vus ne sont journalisés qu’au point de reprise
+# suivant (fin de page), après synchronisation des fichiers de sortie : le journal n’annonce jamais une ligne
+# qui ne serait pas déjà sur disque.
+
+DEFAULT_PATH = "crawl_checkpoint.jsonl"
+
+
+class CrawlJournal:
+    def __init__(self, path=DEFAULT_PATH, resume=False, writers=()):
+        self.path = path
+        self.writers = writers
+        self.pages = set()
+        self.terms = {}
+        self.shows = set()
+        self.mined = []
+        self.markets = {}
+        self.pending_shows = []
+        self.pending_markets = []
+        self.lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            self._load()
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for _, entry in decode_lines(f):
+                if entry["type"] == "page":
+                    self.pages.add((entry["term"], entry["offset"]))
+                elif entry["type"] == "term":
+                    self.terms[entry["term"]] = entry["end"]
+                elif entry["type"] == "show":
+                    self.shows.add(entry["id"])
+                elif entry["type"] == "market":
+                    self.markets.setdefault(entry["id"], set()).add(entry["market"])
+                elif entry["type"] == "mined":
+                    self.mined.append(entry["term"])
+
+    def _checkpoint(self, entry):
+        with self.lock:
+            for writer in self.writers:
+                writer.sync()
+            shows, self.pending_shows = self.pending_shows, []
+            sightings, self.pending_markets = self.pending_markets, []
+            lines = [{"type": "market", "id": show_id, "market": market} for show_id, market in sightings]
+            lines += [{"type": "show", "id": show_id} for show_id in shows]
+            if entry:
+                lines.append(entry)
+            self.file.write("".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def page_done(self, term, offset):
+        self.pages.add((term, offset))
+        self._checkpoint({"type": "page", "term": term, "offset": offset})
+
+    def term_done(self, term, end):
+        self.terms[term] = end
+        self._checkpoint({"type": "term", "term": term, "end": end})
+
+    def term_mined(self, term):
+        self.mined.append(term)
+        self._checkpoint({"type": "mined", "term": term})
+
+    def show_done(self, show_id):
+        with self.lock:
+            self.shows.add(show_id)
+            self.pending_shows.append(show_id)
+
+    def market_seen(self, show_id, market):
+        with self.lock:
+            self.markets.setdefault(show_id, set()).add(market)
+            self.pending_markets.append((show_id, market))
+
+    def is_page_done(self, term, offset):
+        return (term, offset) in self.pages
+
+    def term_end(self, term):
+        # Offset de la page vide qui a clos la pagination, ou None
+        return self.terms.get(term)
+
+    def summary(self):
+        return (
+            f"Reprise : {len(self.terms)} termes terminés, {len(self.pages)} pages "
+            f"et {len(self.shows)} podcasts déjà traités"
+        )
+
+    def close(self):
+        self._checkpoint(None)
+        with self.lock:
+            self.file.close()
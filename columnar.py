@@ -0,0 +1,164 @@
+import os
+import csv
+from datetime import date
+from podcast_filters import normalize_day
+
+# --- EXPORT EN COLONNES ---
+#
+# Podcasts et épisodes aplatis en colonnes typées. Parquet (.parquet) ou Arrow IPC
+# (.arrow / .feather, lisible en mémoire mappée) avec pyarrow ; sinon CSV compact.
+# L’écriture se fait par lots : la mémoire reste bornée quelle que soit la taille de l’export.
+
+SHOW_COLUMNS = ("id", "name", "publisher", "languages", "explicit", "total_episodes", "last_release_date", "market")
+EPISODE_COLUMNS = ("show_id", "id", "name", "release_date", "duration_ms")
+ARROW_SUFFIXES = (".parquet", ".arrow", ".feather")
+BATCH_ROWS = 50000
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("L’export Parquet / Arrow nécessite le paquet 'pyarrow' (pip install pyarrow)")
+    return pyarrow
+
+
+def has_pyarrow():
+    try:
+        _pyarrow()
+    except RuntimeError:
+        return False
+    return True
+
+
+def show_row(show, last_release_date=None, markets=None):
+    markets = show.get("markets") or markets or []
+    return {
+        "id": show["id"],
+        "name": show.get("name"),
+        "publisher": show.get("publisher"),
+        "languages": list(show.get("languages", [])),
+        "explicit": show.get("explicit"),
+        "total_episodes": show.get("total_episodes"),
+        "last_release_date": normalize_day(last_release_date),
+        "market": ",".join(markets) or None,
+    }
+
+
+def episode_rows(show_id, episodes):
+    for ep in episodes or []:
+        if not ep:
+            continue
+        yield {
+            "show_id": show_id,
+            "id": ep.get("id"),
+            "name": ep.get("name"),
+            "release_date": normalize_day(ep.get("release_date")),
+            "duration_ms": ep.get("duration_ms"),
+        }
+
+
+def episodes_path(path):
+    # podcasts.parquet -> podcasts.episodes.parquet, podcasts.jsonl.gz -> podcasts.episodes.jsonl.gz
+    index = path.find(".jsonl")
+    if index < 0:
+        index = len(os.path.splitext(path)[0])
+    return f"{path[:index]}.episodes{path[index:]}"
+
+
+def arrow_schema(columns):
+    pa = _pyarrow()
+    types = {
+        "id": pa.string(),
+        "show_id": pa.string(),
+        "name": pa.string(),
+        "publisher": pa.string(),
+        "languages": pa.list_(pa.string()),
+        "explicit": pa.bool_(),
+        "total_episodes": pa.int32(),
+        "last_release_date": pa.date32(),
+        "release_date": pa.date32(),
+        "duration_ms": pa.int64(),
+        "market": pa.string(),
+    }
+    return pa.schema([(name, types[name]) for name in columns])
+
+
+class ColumnarWriter:
+    def __init__(self, path, columns=SHOW_COLUMNS, batch_rows=BATCH_ROWS):
+        self.path = path
+        self.columns = columns
+        self.batch_rows = batch_rows
+        self.rows = []
+        self.count = 0
+        self.writer = None
+        self.file = None
+        self.arrow = path.endswith(ARROW_SUFFIXES)
+        if self.arrow:
+            self.schema = arrow_schema(columns)
+        else:
+            self.file = open(path, "w", newline="", encoding="utf-8")
+            self.csv = csv.DictWriter(self.file, fieldnames=columns)
+            self.csv.writeheader()
+
+    def write(self, row):
+        self.count += 1
+        if not self.arrow:
+            if "languages" in row:
+                row = {**row, "languages": ",".join(row["languages"])}
+            self.csv.writerow(row)
+            return
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        pa = _pyarrow()
+        data = {name: [row[name] for row in self.rows] for name in self.columns}
+        for name in ("last_release_date", "release_date"):
+            if name in data:
+                data[name] = [date.fromisoformat(day) if day else None for day in data[name]]
+        batch = pa.RecordBatch.from_pydict(data, schema=self.schema)
+        self._open()
+        if self.path.endswith(".parquet"):
+            self.writer.write_batch(batch)
+        else:
+            self.writer.write(batch)
+        self.rows = []
+
+    def _open(self):
+        if self.writer is not None:
+            return
+        if self.path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        else:
+            self.writer = _pyarrow().ipc.new_file(self.path, self.schema)
+
+    def close(self):
+        if self.arrow:
+            self._flush()
+            # Export vide : fichier valide avec le seul schéma
+            self._open()
+            self.writer.close()
+        else:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_columns(path, columns=None):
+    # Table pyarrow limitée aux colonnes demandées ; Arrow IPC est lu en mémoire mappée
+    pa = _pyarrow()
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, columns=columns, memory_map=True)
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.select(columns) if columns else table
@@ -0,0 +1,118 @@
+import json
+import time
+import hashlib
+from sqlite_store import SqliteStore
+from podcast_filters import normalize_day
+
+# --- COLLECTE INCRÉMENTALE ---
+#
+# Empreinte de chaque podcast à la collecte précédente : `total_episodes` et hash de la
+# description (tous deux présents dans les résultats de recherche), plus la date du dernier
+# épisode et les épisodes récupérés. Si l’empreinte n’a pas bougé, les épisodes enregistrés
+# sont réutilisés au lieu d’être redemandés à l’API. L’état « retenu » de chaque podcast
+# permet de produire le différentiel avec la collecte précédente.
+
+DEFAULT_PATH = "show_fingerprints.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    total_episodes INTEGER,
+    description_hash TEXT NOT NULL,
+    last_release_date TEXT,
+    episodes TEXT,
+    matched INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_matched ON fingerprints (matched);
+"""
+
+UPSERT = """
+INSERT INTO fingerprints (id, name, total_episodes, description_hash, last_release_date, episodes, matched, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    name = excluded.name,
+    total_episodes = excluded.total_episodes,
+    description_hash = excluded.description_hash,
+    last_release_date = COALESCE(excluded.last_release_date, fingerprints.last_release_date),
+    episodes = COALESCE(excluded.episodes, fingerprints.episodes),
+    matched = excluded.matched,
+    updated_at = excluded.updated_at
+"""
+
+
+def description_hash(show):
+    return hashlib.sha1(show.get("description", "").encode("utf-8")).hexdigest()[:16]
+
+
+class FingerprintStore(SqliteStore):
+    def __init__(self, path=DEFAULT_PATH, commit_every=500):
+        super().__init__(path, SCHEMA, commit_every)
+        # Podcasts retenus à la collecte précédente : id -> nom
+        self.previous_matches = dict(self.db.execute("SELECT id, name FROM fingerprints WHERE matched = 1"))
+        self.evaluated = {}
+        self.stats = {"reused": 0, "fetched": 0}
+
+    def lookup(self, show):
+        # (épisodes, date du dernier épisode) si l’empreinte est inchangée, sinon None
+        with self.lock:
+            row = self.db.execute(
+                "SELECT total_episodes, description_hash, last_release_date, episodes FROM fingerprints WHERE id = ?",
+                (show["id"],)
+            ).fetchone()
+        if row is None or row[3] is None:
+            return None
+        total_episodes, desc_hash, last_release_date, episodes = row
+        if total_episodes != show.get("total_episodes") or desc_hash != description_hash(show):
+            return None
+        return json.loads(episodes), last_release_date
+
+    def record(self, show, matched, episodes=None, last_release_date=None):
+        row = (
+            show["id"],
+            show.get("name", ""),
+            show.get("total_episodes"),
+            description_hash(show),
+            normalize_day(last_release_date),
+            json.dumps(episodes, ensure_ascii=False) if episodes is not None else None,
+            int(matched),
+            time.time(),
+        )
+        with self.lock:
+            self.evaluated[show["id"]] = (show.get("name", ""), bool(matched))
+            self.db.execute(UPSERT, row)
+            self._written()
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def changes(self):
+        # Différentiel avec la collecte précédente, limité aux podcasts revus cette fois-ci
+        new_matches = [
+            {"change": "nouveau", "id": show_id, "name": name}
+            for show_id, (name, matched) in self.evaluated.items()
+            if matched and show_id not in self.previous_matches
+        ]
+        lost_matches = [
+            {"change": "retiré", "id": show_id, "name": self.evaluated[show_id][0]}
+            for show_id in self.previous_matches
+            if show_id in self.evaluated and not self.evaluated[show_id][1]
+        ]
+        return new_matches, lost_matches
+
+    def unseen_matches(self):
+        return [show_id for show_id in self.previous_matches if show_id not in self.evaluated]
+
+
+def print_changes(output, store, new_matches, lost_matches):
+    columns = [("Changement", "left"), ("Podcasts", "right")]
+    rows = [
+        ["nouveaux podcasts retenus", len(new_matches)],
+        ["ne correspondent plus", len(lost_matches)],
+        ["retenus précédemment, non revus", len(store.unseen_matches())],
+        ["épisodes réutilisés (empreinte inchangée)", store.stats["reused"]],
+        ["épisodes récupérés (nouveau ou modifié)", store.stats["fetched"]],
+    ]
+    output.table("Changements depuis la dernière collecte", columns, rows)
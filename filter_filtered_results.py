@@ -1,8 +1,12 @@
+import os
+import sys
 import json
-from datetime import datetime
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
+import argparse
+from podcast_filters import FilterPipeline, latest_release_date, print_rejections, record_show
+from jsonl_io import JsonlWriter, batched, find_input, iter_records
+from metrics import Metrics, add_metrics_arguments
+from catalog import DEFAULT_PATH as CATALOG_PATH, ShowCatalog
+from render import add_render_arguments, make_output
 
 # --- CONFIGURATION DES FILTRES ---
 
@@ -20,106 +24,153 @@ filters = {
     "last_episode_before": "2025-03-31"
 }
 
-# --- OUTILS ---
-
-def parse_date(date_str):
-    try:
-        return datetime.strptime(date_str, "%Y-%m-%d")
-    except Exception:
-        return None
-
-def get_last_episode_date(episodes):
-    dates = [ep.get("release_date") for ep in episodes if ep.get("release_date")]
-    if not dates:
-        return None
-    latest_str = max(dates)
-    return parse_date(latest_str)
-
 # --- FILTRE PRINCIPAL ---
 
-def match_filters(entry, filters):
-    show = entry["show"]
-    episodes = entry.get("episodes", [])
-
-    title = show['name'].lower()
-    description = show['description'].lower()
-    languages = [l.lower() for l in show.get("languages", [])]
-    total_eps = show.get("total_episodes", 0)
-    is_explicit = show.get("explicit", None)
-
-    if filters["title_include"] and not any(kw in title for kw in filters["title_include"]):
-        return False
-    if filters["title_exclude"] and any(kw in title for kw in filters["title_exclude"]):
-        return False
-    if filters["desc_include"] and not any(kw in description for kw in filters["desc_include"]):
-        return False
-    if filters["desc_exclude"] and any(kw in description for kw in filters["desc_exclude"]):
-        return False
-    if filters["lang"] and not any(lang in languages for lang in filters["lang"]):
-        return False
-    if filters["explicit"] is not None and is_explicit != filters["explicit"]:
-        return False
-    if filters["min_episodes"] and total_eps < filters["min_episodes"]:
-        return False
-    if filters["max_episodes"] and total_eps > filters["max_episodes"]:
-        return False
-    if filters.get("only_questions") and not title.strip().endswith("?"):
-        return False
-
-    latest_date = get_last_episode_date(episodes)
-    if filters.get("last_episode_after"):
-        min_date = parse_date(filters["last_episode_after"])
-        if not latest_date or latest_date < min_date:
-            return False
-    if filters.get("last_episode_before"):
-        max_date = parse_date(filters["last_episode_before"])
-        if not latest_date or latest_date > max_date:
-            return False
-
-    return True
-
-# --- AFFICHAGE ---
-
-def show_podcast(entry):
-    show = entry["show"]
-    episodes = entry.get("episodes", [])
-
-    last_date = max((ep["release_date"] for ep in episodes if ep.get("release_date")), default="N/A")
-    description = show['description'][:200] + "..."
-    panel = Panel.fit(
-        f"[bold yellow]{show['name']}[/bold yellow]\n"
-        f"[green]Publisher:[/green] {show['publisher']}\n"
-        f"[cyan]Langues:[/cyan] {', '.join(show.get('languages', []))}\n"
-        f"[cyan]Episodes:[/cyan] {show['total_episodes']} | Explicite: {show['explicit']}\n"
-        f"[cyan]Dernier épisode :[/cyan] {last_date}\n\n"
-        f"{description}\n\n"
-        f"[blue]{show['external_urls']['spotify']}[/blue]",
-        title="🎙️ Podcast",
-        border_style="magenta"
-    )
-    console.print(panel)
-
-# --- TRAITEMENT ---
-
-console = Console()
-
-try:
-    with open("filtered_results.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
-except FileNotFoundError:
-    console.print("[bold red]Fichier 'filtered_results.json' introuvable.[/bold red]")
-    exit(1)
-
-filtered = [entry for entry in data if match_filters(entry, filters)]
+pipeline = FilterPipeline(filters)
 
-console.rule(f"[bold green]🎯 {len(filtered)} podcasts filtrés sur {len(data)}[/bold green]")
+# --- TRAITEMENT PARALLÈLE ---
 
-for entry in filtered:
-    show_podcast(entry)
+def run_parallel(args, console, metrics):
+    # Plages d’octets filtrées par un pool de processus, profils évalués en une passe
+    from parallel_filter import load_profiles, merge_rejections, parallel_select
 
-# --- EXPORT FINAL ---
+    # Profils compilés et entrée vérifiée avant d’ouvrir (et de vider) le moindre fichier de sortie
+    try:
+        profiles = load_profiles(args.profiles) if args.profiles else {"filtered_from_filtered": filters}
+        pipelines = {}
+        for name, profile in profiles.items():
+            try:
+                pipelines[name] = FilterPipeline(profile)
+            except ValueError as e:
+                raise ValueError(f"profil '{name}' : {e}")
+    except (OSError, ValueError) as e:
+        console.error(f"[bold red]{e}[/bold red]")
+        return 2
+    input_path = args.input or find_input("filtered_results")
+    if not os.path.exists(input_path):
+        console.print(f"[bold red]Fichier '{input_path}' introuvable.[/bold red]")
+        return 1
+    outputs = {
+        name: JsonlWriter(f"filtered_from_filtered.{name}.jsonl" if args.profiles else f"{name}.jsonl")
+        for name in profiles
+    }
+    total = 0
+    console.print(f"🔍 Filtrage parallèle de {input_path} ({len(profiles)} profil(s))...")
+
+    with metrics.timed("stage.parallel"):
+        for matches, rejections, count in parallel_select(input_path, profiles, args.jobs or None):
+            total += count
+            merge_rejections(pipelines, rejections)
+            for name, lines in matches.items():
+                for line in lines:
+                    outputs[name].write_line(line)
+            if len(profiles) == 1:
+                with metrics.timed("render"):
+                    for line in next(iter(matches.values())):
+                        show, last_date = record_show(json.loads(line))
+                        console.podcast(show, last_date)
+
+    for name, writer in outputs.items():
+        writer.close()
+        print_rejections(console, pipelines[name], f"Rejets par filtre — {name}")
+    console.rule(f"[bold green]🎯 {total} podcasts lus, {len(profiles)} profil(s)[/bold green]")
+    console.print("[green]Résultats exportés dans :[/green]")
+    for name, writer in outputs.items():
+        console.print(f" - [blue]{writer.path}[/blue] ({writer.count} podcasts filtrés sur {total})")
+    return 0
 
-with open("filtered_from_filtered.json", "w", encoding="utf-8") as f:
-    json.dump(filtered, f, ensure_ascii=False, indent=2)
+# --- TRAITEMENT ---
 
-console.print("[green]Résultats exportés dans :[/green] [blue]filtered_from_filtered.json[/blue]")
+def metrics_blocks(metrics, blocks):
+    # Mesure la lecture/décodage de chaque bloc
+    while True:
+        with metrics.timed("read.block"):
+            block = next(blocks, None)
+        if block is None:
+            return
+        yield block
+
+def run_sequential(args, console, metrics):
+    catalog = None
+    if args.catalog:
+        # Les index font le tri ; le filtre compilé revérifie les quelques lignes retenues
+        catalog = ShowCatalog(args.catalog)
+        source = (
+            {"show": show, "episodes": episodes, "last_episode_date": last_date}
+            for show, episodes, last_date in catalog.query(filters)
+        )
+    else:
+        input_path = args.input or find_input("filtered_results")
+        if not os.path.exists(input_path):
+            console.print(f"[bold red]Fichier '{input_path}' introuvable.[/bold red]")
+            return 1
+        source = iter_records(input_path)
+
+    output = JsonlWriter("filtered_from_filtered.jsonl")
+    total = 0
+
+    # Lecture en flux, filtrage par blocs
+    for block in metrics_blocks(metrics, batched(source, 10000)):
+        total += len(block)
+        shows = [entry["show"] for entry in block]
+        last_dates = [
+            entry.pop("last_episode_date", None) or latest_release_date(entry.get("episodes", []))
+            for entry in block
+        ]
+        with metrics.timed("filter.select"):
+            selected = pipeline.select(shows, last_dates)
+        for i in selected:
+            with metrics.timed("render"):
+                console.podcast(block[i]["show"], last_dates[i])
+            output.write(block[i])
+
+    output.close()
+    if catalog:
+        total = catalog.count()
+        catalog.close()
+
+    # --- BILAN ---
+
+    print_rejections(console, pipeline)
+    console.rule(f"[bold green]🎯 {output.count} podcasts filtrés sur {total}[/bold green]")
+    console.print(f"[green]Résultats exportés dans :[/green] [blue]filtered_from_filtered.jsonl[/blue] ({output.count} podcasts filtrés sur {total})")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Filtre à nouveau filtered_results.jsonl, sans appel API")
+    parser.add_argument("--input", help="Fichier à filtrer (par défaut : filtered_results.jsonl, .jsonl.gz, .jsonl.zst ou .json)")
+    parser.add_argument("--catalog", nargs="?", const=CATALOG_PATH,
+                        help="Interroge le catalogue SQLite (requête indexée) au lieu de lire un fichier")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Processus de filtrage en parallèle (0 : un par cœur)")
+    parser.add_argument("--profiles",
+                        help="Fichier JSON {nom: filtres} : tous les profils en une passe, une sortie par profil")
+    add_metrics_arguments(parser, "filter_filtered_metrics.json")
+    add_render_arguments(parser)
+    args = parser.parse_args()
+
+    console = make_output(args)
+    metrics = Metrics()
+    try:
+        if args.profiles or args.jobs != 1:
+            if args.catalog:
+                console.print("[bold red]--jobs et --profiles lisent un fichier : incompatibles avec --catalog.[/bold red]")
+                return 2
+            status = run_parallel(args, console, metrics)
+        else:
+            status = run_sequential(args, console, metrics)
+        if status:
+            return status
+
+        metrics.print(console)
+        metrics.write(args.metrics)
+        console.print(f"[green]Mesures exportées dans :[/green] [blue]{args.metrics}[/blue]")
+        return 0
+    finally:
+        console.close()
+
+
+# Garde obligatoire : avec la méthode spawn (Windows, macOS), chaque processus de
+# filtrage réimporte ce script
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,13 @@
-import json
+import os
 import time
-from datetime import datetime
-from dotenv import load_dotenv
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from rich.console import Console
-from rich.panel import Panel
+import argparse
+from response_cache import ResponseCache, CacheMiss, add_cache_arguments, cache_mode
+from show_metadata import SHOWS_BATCH_SIZE, fetch_shows
+from podcast_filters import FilterPipeline, latest_release_date, print_rejections
+from jsonl_io import JsonlWriter, batched, find_input, iter_records
+from metrics import Metrics, add_metrics_arguments
+from catalog import DEFAULT_PATH as CATALOG_PATH, ShowCatalog
+from render import add_render_arguments, make_output
 
 # --- CONFIGURATION DES FILTRES ---
 
@@ -20,119 +22,137 @@ filters = {
     "max_episodes": 6,
     "only_questions": True,
     "last_episode_after": "2025-03-30",   # YYYY-MM-DD
-    "last_episode_before": "2025-04-01"
+    "last_episode_before": "2025-04-01",
+    "market": "FR"
 }
 
 # --- INITIALISATION API & CONSOLE ---
 
-load_dotenv()
-sp = spotipy.Spotify(
-    auth_manager=SpotifyClientCredentials()
-)
-console = Console()
+parser = argparse.ArgumentParser(description="Filtre raw_results.jsonl à partir des dates d’épisodes")
+parser.add_argument("--input", help="Fichier à filtrer (par défaut : raw_results.jsonl, .jsonl.gz, .jsonl.zst ou .json)")
+parser.add_argument("--catalog", nargs="?", const=CATALOG_PATH,
+                    help="Lit les podcasts dans le catalogue SQLite (requête indexée) au lieu d’un fichier")
+add_cache_arguments(parser)
+add_metrics_arguments(parser, "filter_raw_metrics.json")
+add_render_arguments(parser)
+args = parser.parse_args()
+
+metrics = Metrics()
+sp = None
+console = make_output(args)
+cache = ResponseCache(args.cache_path, mode=cache_mode(args))
 
 # --- OUTILS ---
 
-def parse_date(date_str):
-    try:
-        return datetime.strptime(date_str, "%Y-%m-%d")
-    except:
-        return None
+def spotify():
+    # Client créé au premier appel réseau : jamais en mode --cache-only
+    global sp
+    if sp is None:
+        from spotify_client import create_client
+        sp = create_client(metrics, retry_429=True)
+    return sp
+
+def request_episodes(show_id):
+    with metrics.timed("sleep"):
+        time.sleep(0.2)  # pour éviter les erreurs d’API (seulement hors cache)
+    return spotify().show_episodes(show_id, limit=50)
+
+def request_shows(show_ids):
+    with metrics.timed("sleep"):
+        time.sleep(0.2)  # pour éviter les erreurs d’API (seulement hors cache)
+    return spotify().shows(show_ids, market=filters["market"])
 
 def get_last_episode_date(show_id):
     try:
-        episodes = sp.show_episodes(show_id, limit=50)['items']
-        dates = [ep.get("release_date") for ep in episodes if ep.get("release_date")]
-        if not dates:
-            return None
-        return max(dates)
+        response = cache.fetch(
+            "show_episodes", {"id": show_id, "limit": 50},
+            lambda: request_episodes(show_id)
+        )
+        return latest_release_date(response['items'])
+    except CacheMiss:
+        return None
     except Exception as e:
-        console.log(f"[red]Erreur récupération épisodes pour {show_id} : {e}[/red]")
+        console.error(f"[red]Erreur récupération épisodes pour {show_id} : {e}[/red]")
         return None
 
+def report_shows_error(chunk, error):
+    # Lot en échec : les métadonnées issues de la recherche sont conservées pour ces podcasts
+    console.error(f"[red]Erreur récupération métadonnées pour {len(chunk)} podcasts : {error}[/red]")
+
 # --- FILTRAGE ---
 
-def match_filters(show, filters, last_episode_date=None):
-    title = show['name'].lower()
-    description = show['description'].lower()
-    languages = [l.lower() for l in show.get("languages", [])]
-    total_eps = show.get("total_episodes", 0)
-    is_explicit = show.get("explicit", None)
-
-    if filters["title_include"] and not any(kw in title for kw in filters["title_include"]):
-        return False
-    if filters["title_exclude"] and any(kw in title for kw in filters["title_exclude"]):
-        return False
-    if filters["desc_include"] and not any(kw in description for kw in filters["desc_include"]):
-        return False
-    if filters["desc_exclude"] and any(kw in description for kw in filters["desc_exclude"]):
-        return False
-    if filters["lang"] and not any(lang in languages for lang in filters["lang"]):
-        return False
-    if filters["explicit"] is not None and is_explicit != filters["explicit"]:
-        return False
-    if filters["min_episodes"] and total_eps < filters["min_episodes"]:
-        return False
-    if filters["max_episodes"] and total_eps > filters["max_episodes"]:
-        return False
-    if filters.get("only_questions") and not title.strip().endswith("?"):
-        return False
-
-    # Appliquer le filtre sur la date du dernier épisode
-    if filters.get("last_episode_after"):
-        min_date = parse_date(filters["last_episode_after"])
-        if not last_episode_date or parse_date(last_episode_date) < min_date:
-            return False
-    if filters.get("last_episode_before"):
-        max_date = parse_date(filters["last_episode_before"])
-        if not last_episode_date or parse_date(last_episode_date) > max_date:
-            return False
-
-    return True
-
-# --- AFFICHAGE ---
-
-def show_podcast(show, last_date=None):
-    description = show['description'][:200] + "..."
-    panel = Panel.fit(
-        f"[bold yellow]{show['name']}[/bold yellow]\n"
-        f"[green]Publisher:[/green] {show['publisher']}\n"
-        f"[cyan]Langues:[/cyan] {', '.join(show.get('languages', []))}\n"
-        f"[cyan]Episodes:[/cyan] {show['total_episodes']} | Explicite: {show['explicit']}\n"
-        f"[cyan]Dernier épisode :[/cyan] {last_date or 'N/A'}\n\n"
-        f"{description}\n\n"
-        f"[blue]{show['external_urls']['spotify']}[/blue]",
-        title="🎙️ Podcast",
-        border_style="magenta"
-    )
-    console.print(panel)
+pipeline = FilterPipeline(filters)
 
 # --- TRAITEMENT ---
 
-try:
-    with open("raw_results.json", "r", encoding="utf-8") as f:
-        raw_results = json.load(f)
-except FileNotFoundError:
-    console.print("[bold red]Fichier 'raw_results.json' introuvable.[/bold red]")
-    exit(1)
-
-filtered = []
-console.print(f"🔍 Chargement de {len(raw_results)} podcasts depuis raw_results.json...")
-
-for i, show in enumerate(raw_results, 1):
-    show_id = show['id']
-    console.log(f"({i}/{len(raw_results)}) Vérification : {show['name']}")
-    last_date = get_last_episode_date(show_id)
-    if match_filters(show, filters, last_episode_date=last_date):
-        show_podcast(show, last_date)
-        show["last_episode_date"] = last_date
-        filtered.append(show)
-    time.sleep(0.2)  # pour éviter les erreurs d’API
-
-# --- EXPORT FINAL ---
-
-with open("filtered_from_raw.json", "w", encoding="utf-8") as f:
-    json.dump(filtered, f, ensure_ascii=False, indent=2)
-
-console.rule(f"[bold green]🎯 {len(filtered)} podcasts filtrés sur {len(raw_results)}[/bold green]")
-console.print("[green]Résultats exportés dans :[/green] [blue]filtered_from_raw.json[/blue]")
+catalog = None
+if args.catalog:
+    # Le catalogue applique les critères sans dates ; les dates sont vérifiées via l’API
+    catalog = ShowCatalog(args.catalog)
+    console.print(f"🔍 Requête sur le catalogue {args.catalog}...")
+    source = (show for show, _, _ in catalog.query(filters, with_dates=False))
+else:
+    input_path = args.input or find_input("raw_results")
+    if not os.path.exists(input_path):
+        console.print(f"[bold red]Fichier '{input_path}' introuvable.[/bold red]")
+        console.close()
+        exit(1)
+    console.print(f"🔍 Lecture en flux de {input_path}...")
+    source = iter_records(input_path)
+
+output = JsonlWriter("filtered_from_raw.jsonl", key=lambda show: show["id"])
+seen_ids = set()
+total = 0
+
+# Par blocs : métadonnées à jour par lots de 50, puis épisodes uniquement pour les podcasts retenus
+for block in batched(source, 10 * SHOWS_BATCH_SIZE):
+    candidates = []
+    for show in block:
+        if show['id'] not in seen_ids:
+            seen_ids.add(show['id'])
+            candidates.append(show)
+
+    with metrics.timed("stage.shows_batch"):
+        fresh_shows = fetch_shows(
+            request_shows, [show['id'] for show in candidates],
+            market=filters["market"], cache=cache, on_error=report_shows_error
+        )
+
+    # Une ligne de progression par bloc plutôt qu’une par podcast
+    console.log(f"({total + len(candidates)}) Vérification de {len(candidates)} podcasts...")
+    for show in candidates:
+        total += 1
+        show = fresh_shows.get(show['id'], show)
+        with metrics.timed("filter.metadata"):
+            if not pipeline.match_metadata(show):
+                continue
+        with metrics.timed("stage.episodes"):
+            last_date = get_last_episode_date(show['id'])
+        if catalog:
+            catalog.upsert(show, last_episode_date=last_date)
+        with metrics.timed("filter.episodes"):
+            matched = pipeline.match_episodes(last_date)
+        if matched:
+            with metrics.timed("render"):
+                console.podcast(show, last_date)
+            show["last_episode_date"] = last_date
+            output.write(show)
+
+output.close()
+if catalog:
+    catalog.close()
+
+# --- BILAN ---
+
+print_rejections(console, pipeline)
+console.rule(f"[bold green]🎯 {output.count} podcasts filtrés sur {total}[/bold green]")
+console.print(f"[green]Résultats exportés dans :[/green] [blue]filtered_from_raw.jsonl[/blue] ({output.count} podcasts filtrés sur {total})")
+console.print(f"[dim]{cache.summary()}[/dim]")
+cache.close()
+
+for name, value in cache.stats.items():
+    metrics.gauge(f"cache.{name}", value)
+metrics.print(console)
+metrics.write(args.metrics)
+console.print(f"[green]Mesures exportées dans :[/green] [blue]{args.metrics}[/blue]")
+console.close()
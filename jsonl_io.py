@@ -0,0 +1,212 @@
+import io
+import os
+import gzip
+import json
+import threading
+
+# --- FICHIERS JSONL EN FLUX ---
+#
+# Un enregistrement JSON par ligne, ajouté dès qu’il arrive. Le suffixe du fichier
+# choisit la compression : ".jsonl", ".jsonl.gz" ou ".jsonl.zst" (module zstandard).
+
+COMPRESSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def output_path(base, compression="none"):
+    return f"{base}.jsonl{COMPRESSIONS[compression]}"
+
+
+def find_input(base):
+    # Fichier le plus récent parmi les formats connus (y compris l’ancien .json)
+    candidates = [output_path(base, c) for c in COMPRESSIONS] + [f"{base}.json"]
+    existing = [path for path in candidates if os.path.exists(path)]
+    if not existing:
+        return candidates[0]
+    return max(existing, key=os.path.getmtime)
+
+
+def compression_of(path):
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return "none"
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("La compression zstd nécessite le paquet 'zstandard' (pip install zstandard)")
+    return zstandard
+
+
+class JsonlWriter:
+    def __init__(self, path, key=None, fsync_every=100, append=False):
+        self.path = path
+        self.key = key
+        self.fsync_every = fsync_every
+        self.compression = compression_of(path)
+        self.seen = set()
+        self.count = 0
+        self.pending = 0
+        self.lock = threading.Lock()
+
+        mode = "ab" if append else "wb"
+        self.raw = open(path, mode)
+        if self.compression == "gzip":
+            self.stream = gzip.GzipFile(fileobj=self.raw, mode=mode)
+        elif self.compression == "zstd":
+            self.stream = _zstandard().ZstdCompressor().stream_writer(self.raw, closefd=False)
+        else:
+            self.stream = self.raw
+
+    def write(self, record):
+        # Renvoie False si l’enregistrement a déjà été écrit (même clé)
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self.lock:
+            if self.key:
+                record_key = self.key(record)
+                if record_key in self.seen:
+                    return False
+                self.seen.add(record_key)
+            self.stream.write(line)
+            self.count += 1
+            self.pending += 1
+            if self.pending >= self.fsync_every:
+                self._sync()
+        return True
+
+    def write_line(self, line):
+        # Ligne déjà sérialisée (octets, terminée par "\n"), sans dédoublonnage
+        with self.lock:
+            self.stream.write(line)
+            self.count += 1
+            self.pending += 1
+            if self.pending >= self.fsync_every:
+                self._sync()
+
+    def _sync(self):
+        if self.compression == "gzip":
+            self.stream.flush()
+        elif self.compression == "zstd":
+            self.stream.flush(_zstandard().FLUSH_BLOCK)
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        self.pending = 0
+
+    def sync(self):
+        with self.lock:
+            self._sync()
+
+    def close(self):
+        with self.lock:
+            self._sync()
+            if self.stream is not self.raw:
+                self.stream.close()
+            self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def reopen(path, key=None, **kwargs):
+    # Reprise : recopie les enregistrements lisibles (dernière ligne ou bloc compressé
+    # tronqués exclus) dans un fichier neuf, puis poursuit l’écriture à la suite.
+    partial = path.replace(".jsonl", ".partial.jsonl", 1)
+    if not os.path.exists(partial):
+        if not os.path.exists(path):
+            return JsonlWriter(path, key=key, **kwargs)
+        os.replace(path, partial)
+
+    writer = JsonlWriter(path, key=key, **kwargs)
+    for record in iter_records(partial):
+        writer.write(record)
+    writer.sync()
+    os.remove(partial)
+    return writer
+
+
+def _open_lines(path):
+    compression = compression_of(path)
+    if compression == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if compression == "zstd":
+        raw = open(path, "rb")
+        reader = _zstandard().ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def decode_lines(lines):
+    # (ligne, enregistrement) pour chaque ligne lisible, texte ou octets
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield line, json.loads(line)
+        except json.JSONDecodeError:
+            # Dernière ligne tronquée par un arrêt brutal
+            continue
+
+
+def iter_records(path):
+    # Ancien format : tableau JSON complet
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+
+    with _open_lines(path) as f:
+        try:
+            for _, record in decode_lines(f):
+                yield record
+        except EOFError:
+            # Flux compressé interrompu avant la fin
+            return
+
+
+def byte_ranges(path, chunk_size):
+    # Découpe un .jsonl non compressé en plages [début, fin) alignées sur les fins de ligne
+    size = os.path.getsize(path)
+    ranges = []
+    start = 0
+    with open(path, "rb") as f:
+        while start < size:
+            f.seek(min(start + chunk_size, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_range(path, start, end):
+    # Lignes brutes (octets) commençant dans la plage [début, fin)
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start).splitlines(keepends=True)
+
+
+def iter_lines(path):
+    # Lignes brutes (octets) d’un .jsonl éventuellement compressé, sans décodage JSON
+    with _open_lines(path) as f:
+        try:
+            for line in f:
+                yield line.encode("utf-8")
+        except EOFError:
+            return
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
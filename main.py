@@ -1,17 +1,7 @@
-import os
-from dotenv import load_dotenv
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
+from spotify_client import create_client
 
-# Load environment variables from .env file
-load_dotenv()
-
-client_id = os.getenv('SPOTIFY_CLIENT_ID')
-client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
-
-# Set up Spotify auth
-auth_manager = SpotifyClientCredentials(client_id=client_id, client_secret=client_secret)
-sp = spotipy.Spotify(auth_manager=auth_manager)
+# Shared Spotify client (credentials from .env, token cached on disk)
+sp = create_client(retry_429=True)
 
 # Search for a podcast show
 query = "The Daily"
@@ -0,0 +1,198 @@
+import json
+import math
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# --- INSTRUMENTATION ---
+#
+# Histogrammes de latence à seaux logarithmiques (mémoire bornée, quantiles à ~10 % près),
+# compteurs et jauges. Export JSON ou texte Prometheus selon l’extension du fichier.
+
+HIST_BASE = 1e-4     # 0,1 ms
+HIST_GROWTH = 1.2
+
+
+def bucket_bound(index):
+    return HIST_BASE * HIST_GROWTH ** index
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = 0 if value <= HIST_BASE else math.ceil(math.log(value / HIST_BASE, HIST_GROWTH))
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(bucket_bound(index), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "max": self.max,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.counters = Counter()
+        self.gauges = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def incr(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self.lock:
+            elapsed = time.perf_counter() - self.started
+            return {
+                "elapsed_seconds": elapsed,
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "latency_seconds": {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+                "throughput_per_second": {
+                    name: h.count / elapsed if elapsed else 0.0
+                    for name, h in sorted(self.histograms.items())
+                },
+            }
+
+    def to_prometheus(self, prefix="podcast"):
+        def metric_name(name):
+            return f"{prefix}_" + "".join(c if c.isalnum() else "_" for c in name)
+
+        lines = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {metric_name(name)}_total counter")
+                lines.append(f"{metric_name(name)}_total {value}")
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE {metric_name(name)} gauge")
+                lines.append(f"{metric_name(name)} {value}")
+            for name, histogram in sorted(self.histograms.items()):
+                base = metric_name(name) + "_seconds"
+                lines.append(f"# TYPE {base} histogram")
+                cumulative = 0
+                for index in sorted(histogram.buckets):
+                    cumulative += histogram.buckets[index]
+                    lines.append(f'{base}_bucket{{le="{bucket_bound(index):.6g}"}} {cumulative}')
+                lines.append(f'{base}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{base}_sum {histogram.total}")
+                lines.append(f"{base}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".prom"):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    def print(self, output):
+        snapshot = self.snapshot()
+        columns = [("Étape / appel", "left"), ("Nombre", "right"), ("p50 (ms)", "right"),
+                   ("p95 (ms)", "right"), ("p99 (ms)", "right"), ("Total (s)", "right"), ("/s", "right")]
+        rows = [
+            [
+                name, h["count"],
+                f"{h['p50'] * 1000:.1f}", f"{h['p95'] * 1000:.1f}", f"{h['p99'] * 1000:.1f}",
+                f"{h['sum']:.2f}", f"{snapshot['throughput_per_second'][name]:.1f}"
+            ]
+            for name, h in snapshot["latency_seconds"].items()
+        ]
+        counters = {**snapshot["counters"], **snapshot["gauges"]}
+        caption = " | ".join(
+            f"{name}={value:.2f}" if isinstance(value, float) else f"{name}={value}"
+            for name, value in sorted(counters.items())
+        )
+        output.table(f"Mesures ({snapshot['elapsed_seconds']:.1f} s)", columns, rows, caption)
+
+
+class InstrumentedClient:
+    # Enveloppe un client spotipy : latence et erreurs par méthode, volume HTTP reçu
+    def __init__(self, client, metrics):
+        self._client = client
+        self._metrics = metrics
+        session = getattr(client, "_session", None)
+        if session is not None:
+            session.hooks["response"].append(self._on_response)
+
+    def _on_response(self, response, *args, **kwargs):
+        self._metrics.incr("http.requests")
+        self._metrics.incr(f"http.status.{response.status_code}")
+        self._metrics.incr("http.bytes_received", len(response.content))
+        # Réessais faits par urllib3 avant la réponse finale (5xx, et 429 avec retry_429)
+        retries = getattr(response.raw, "retries", None)
+        for attempt in getattr(retries, "history", ()):
+            self._metrics.incr("http.retries")
+            if attempt.status:
+                self._metrics.incr(f"http.retry_status.{attempt.status}")
+            if attempt.status == 429:
+                self._metrics.incr("spotify.429")
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            except Exception as e:
+                status = getattr(e, "http_status", None)
+                self._metrics.incr(f"spotify.{name}.errors")
+                if status == 429:
+                    self._metrics.incr("spotify.429")
+                raise
+            finally:
+                self._metrics.observe(f"spotify.{name}", time.perf_counter() - start)
+
+        return call
+
+
+def add_metrics_arguments(parser, default):
+    parser.add_argument("--metrics", default=default,
+                        help=f"Fichier de mesures (.json ou .prom, par défaut : {default})")
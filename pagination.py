@@ -0,0 +1,68 @@
+import threading
+from collections import Counter
+
+# --- PAGINATION ADAPTATIVE ---
+#
+# Une recherche s’arrête dès que l’une de ces règles s’applique :
+#   total      : l’offset suivant dépasse `shows.total`
+#   next       : la réponse n’a plus de curseur `shows.next`
+#   rendement  : trop peu de podcasts nouveaux sur plusieurs pages consécutives
+#   page_vide  : page vide (seul critère de l’ancienne boucle)
+#   budget     : budget de requêtes épuisé avant la fin du terme (--budget)
+
+MAX_OFFSET = 1000
+PAGE_SIZE = 50
+
+RULES = ("total", "next", "rendement", "page_vide", "budget")
+
+
+def pages_left(next_offset, total):
+    # Requêtes qu’aurait encore faites la boucle fixe (page vide finale comprise)
+    offsets = range(next_offset, MAX_OFFSET, PAGE_SIZE)
+    full = sum(1 for offset in offsets if offset < total)
+    empty = 1 if any(offset >= total for offset in offsets) else 0
+    return full + empty
+
+
+class TermPager:
+    def __init__(self, min_new_ratio, patience):
+        self.min_new_ratio = min_new_ratio
+        self.patience = patience
+        self.low_pages = 0
+
+    def stop_rule(self, results, offset, new_count):
+        page = results.get('shows', {})
+        items = page.get('items', [])
+        total = page.get('total', MAX_OFFSET)
+        next_offset = offset + PAGE_SIZE
+
+        if next_offset >= min(total, MAX_OFFSET):
+            return "total"
+        if not page.get('next'):
+            return "next"
+        if self.min_new_ratio and items:
+            if new_count / len(items) < self.min_new_ratio:
+                self.low_pages += 1
+            else:
+                self.low_pages = 0
+            if self.low_pages >= self.patience:
+                return "rendement"
+        return None
+
+
+class PaginationReport:
+    def __init__(self):
+        self.stops = Counter()
+        self.saved = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, rule, saved=0):
+        with self.lock:
+            self.stops[rule] += 1
+            self.saved[rule] += saved
+
+    def print(self, output):
+        columns = [("Règle", "left"), ("Termes arrêtés", "right"), ("Pages économisées", "right")]
+        rows = [[rule, self.stops[rule], self.saved[rule]] for rule in RULES]
+        caption = f"{sum(self.saved.values())} requêtes de recherche évitées"
+        output.table("Arrêts de pagination", columns, rows, caption)
@@ -0,0 +1,90 @@
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+from jsonl_io import batched, byte_ranges, compression_of, decode_lines, iter_lines, iter_records, read_range
+from podcast_filters import FilterPipeline, record_show
+
+# --- FILTRAGE PARALLÈLE MULTI-PROFILS ---
+#
+# Un .jsonl non compressé est découpé en plages d’octets alignées sur les lignes ; chaque
+# processus lit, décode et filtre sa plage pour tous les profils à la fois et renvoie les
+# lignes retenues telles quelles (sans resérialisation). Les résultats sont fusionnés dans
+# l’ordre des plages, donc dans l’ordre du fichier d’origine.
+# Fichiers compressés : décompression dans le processus principal, décodage JSON et filtrage
+# répartis par blocs de lignes.
+# Méthode de démarrage par défaut de la plateforme : avec spawn (Windows, macOS), le script
+# appelant est réimporté par chaque processus et doit garder son code sous `__main__`.
+
+CHUNK_BYTES = 8 * 1024 * 1024
+BLOCK_LINES = 20000
+
+
+def filter_lines(lines, profiles):
+    # -> ({profil: [lignes retenues]}, {profil: Counter des rejets}, lignes lues)
+    shows = []
+    last_dates = []
+    kept = []
+    for line, record in decode_lines(lines):
+        show, last_date = record_show(record)
+        shows.append(show)
+        last_dates.append(last_date)
+        kept.append(line if line.endswith(b"\n") else line + b"\n")
+
+    matches = {}
+    rejections = {}
+    for name, filters in profiles.items():
+        pipeline = FilterPipeline(filters)
+        matches[name] = [kept[i] for i in pipeline.select(shows, last_dates)]
+        rejections[name] = pipeline.rejections
+    return matches, rejections, len(kept)
+
+
+def filter_range(task):
+    path, start, end, profiles = task
+    return filter_lines(read_range(path, start, end), profiles)
+
+
+def filter_block(task):
+    lines, profiles = task
+    return filter_lines(lines, profiles)
+
+
+def encoded_lines(path):
+    if path.endswith(".json"):
+        # Ancien format : tableau JSON complet, décodé une fois dans le processus principal
+        return ((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8") for record in iter_records(path))
+    return iter_lines(path)
+
+
+def parallel_select(path, profiles, jobs=None, chunk_bytes=CHUNK_BYTES):
+    # Générateur de résultats par plage (ou bloc), dans l’ordre du fichier
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        if compression_of(path) == "none" and not path.endswith(".json"):
+            tasks = [(path, start, end, profiles) for start, end in byte_ranges(path, chunk_bytes)]
+            yield from pool.map(filter_range, tasks)
+        else:
+            tasks = ((lines, profiles) for lines in batched(encoded_lines(path), BLOCK_LINES))
+            # Au plus 2 blocs en attente par processus : mémoire bornée
+            pending = []
+            for task in tasks:
+                pending.append(pool.submit(filter_block, task))
+                if len(pending) >= 2 * jobs:
+                    yield pending.pop(0).result()
+            for future in pending:
+                yield future.result()
+
+
+def merge_rejections(pipelines, rejections):
+    for name, counts in rejections.items():
+        pipelines[name].rejections.update(counts)
+
+
+def load_profiles(path):
+    # {"nom": {filtres...}, ...}
+    with open(path, encoding="utf-8") as f:
+        profiles = json.load(f)
+    if not isinstance(profiles, dict) or not all(isinstance(p, dict) for p in profiles.values()):
+        raise ValueError(f"{path} : un objet JSON {{nom: filtres}} est attendu")
+    return profiles
+
@@ -0,0 +1,320 @@
+import os
+import sys
+import argparse
+
+# --- POINT D’ENTRÉE UNIQUE ---
+#
+# python podcast_cli.py search   --search vin --lang fr --episodes
+# python podcast_cli.py refilter --title-include vin --after 2025-01-01 --quiet
+# python podcast_cli.py export   --catalog --lang fr --output vin.parquet
+#
+# Les modules lourds (spotipy, dotenv, rich, sqlite3) ne sont importés que par la
+# sous-commande qui s’en sert : `refilter` et `export` ne créent jamais de client Spotify
+# et, avec --quiet ou --json, démarrent sans charger rich.
+
+PAGE_SIZE = 50
+CATALOG_PATH = "podcast_catalog.sqlite"     # catalog.DEFAULT_PATH, sans importer sqlite3
+
+
+# --- FILTRES EN LIGNE DE COMMANDE ---
+
+def iso_day(value):
+    # Validation dès l’analyse des arguments : une borne mal formée n’atteint pas les filtres
+    from podcast_filters import normalize_day
+
+    day = normalize_day(value)
+    if day is None:
+        raise argparse.ArgumentTypeError(f"date invalide {value!r} (format attendu : YYYY-MM-DD)")
+    return day
+
+
+def add_filter_arguments(parser):
+    parser.add_argument("--title-include", nargs="+", default=[], help="Mots-clés obligatoires dans le titre")
+    parser.add_argument("--title-exclude", nargs="+", default=[], help="Mots-clés interdits dans le titre")
+    parser.add_argument("--desc-include", nargs="+", default=[], help="Mots-clés obligatoires dans la description")
+    parser.add_argument("--desc-exclude", nargs="+", default=[], help="Mots-clés interdits dans la description")
+    parser.add_argument("--lang", nargs="+", default=[], help="Langues du podcast (ex : fr en)")
+    parser.add_argument("--explicit", dest="explicit", action="store_const", const=True, help="Podcasts explicites uniquement")
+    parser.add_argument("--clean", dest="explicit", action="store_const", const=False, help="Podcasts non explicites uniquement")
+    parser.add_argument("--min-total", type=int, help="Nombre minimal d’épisodes publiés")
+    parser.add_argument("--max-total", type=int, help="Nombre maximal d’épisodes publiés")
+    parser.add_argument("--questions", action="store_true", help="Titres en forme de question uniquement")
+    parser.add_argument("--after", type=iso_day, help="Dernier épisode à partir de cette date (YYYY-MM-DD)")
+    parser.add_argument("--before", type=iso_day, help="Dernier épisode jusqu’à cette date (YYYY-MM-DD)")
+
+
+def filters_from_args(args):
+    return {
+        "title_include": args.title_include,
+        "title_exclude": args.title_exclude,
+        "desc_include": args.desc_include,
+        "desc_exclude": args.desc_exclude,
+        "lang": args.lang,
+        "explicit": args.explicit,
+        "min_episodes": args.min_total,
+        "max_episodes": args.max_total,
+        "only_questions": args.questions,
+        "last_episode_after": args.after,
+        "last_episode_before": args.before,
+    }
+
+
+def add_source_arguments(parser, default_input):
+    parser.add_argument("--input", help=f"Fichier JSONL à lire (par défaut : {default_input}.jsonl le plus récent)")
+    parser.add_argument("--catalog", nargs="?", const=CATALOG_PATH,
+                        help="Interroge le catalogue SQLite au lieu de lire un fichier")
+
+
+def read_entries(args, console, filters, default_input):
+    # (enregistrement d’origine, podcast, épisodes, date du dernier épisode).
+    # La source est vérifiée tout de suite : aucun fichier de sortie n’est ouvert avant.
+    if args.catalog:
+        return catalog_entries(args.catalog, filters)
+
+    from jsonl_io import find_input
+
+    input_path = args.input or find_input(default_input)
+    if not os.path.exists(input_path):
+        console.print(f"[bold red]Fichier '{input_path}' introuvable.[/bold red]")
+        sys.exit(1)
+    return file_entries(input_path)
+
+
+def catalog_entries(path, filters):
+    from catalog import ShowCatalog
+
+    catalog = ShowCatalog(path)
+    try:
+        for show, episodes, last_date in catalog.query(filters):
+            yield {"show": show, "episodes": episodes}, show, episodes, last_date
+    finally:
+        catalog.close()
+
+
+def file_entries(path):
+    from podcast_filters import latest_release_date
+    from jsonl_io import iter_records
+
+    for record in iter_records(path):
+        if "show" in record:
+            episodes = record.get("episodes", [])
+            yield record, record["show"], episodes, record.get("last_episode_date") or latest_release_date(episodes)
+        else:
+            yield record, record, [], record.get("last_episode_date")
+
+
+def select_entries(entries, pipeline, size=10000):
+    # Filtrage par blocs (version liste du pipeline), sans aucun appel réseau
+    from jsonl_io import batched
+
+    for block in batched(entries, size):
+        shows = [entry[1] for entry in block]
+        last_dates = [entry[3] for entry in block]
+        for i in pipeline.select(shows, last_dates):
+            yield block[i]
+
+
+# --- SOUS-COMMANDES ---
+
+def cmd_search(args, console):
+    from podcast_filters import FilterPipeline, latest_release_date, print_rejections
+    from rate_limiter import TokenBucket, call_with_backoff
+    from response_cache import CacheMiss, ResponseCache, cache_mode
+    from jsonl_io import JsonlWriter
+
+    query = args.search or " ".join(args.title_include)
+    if not query:
+        console.print("[bold red]Indiquez --search ou --title-include.[/bold red]")
+        return 2
+
+    filters = filters_from_args(args)
+    pipeline = FilterPipeline(filters)
+    cache = ResponseCache(args.cache_path, mode=cache_mode(args))
+    limiter = TokenBucket(args.rate)
+    client = []
+
+    def request(func_name, **params):
+        # Le client n’est créé qu’au premier appel réellement envoyé à l’API
+        if not client:
+            from spotify_client import create_client
+            client.append(create_client())
+        return call_with_backoff(limiter, getattr(client[0], func_name), **params)
+
+    output = JsonlWriter(args.output, key=lambda entry: entry["show"]["id"]) if args.output else None
+    console.rule(f"[bold green]🔍 Recherche : {query}[/bold green]")
+    found = 0
+    try:
+        for offset in range(0, args.limit, PAGE_SIZE):
+            params = {"q": query, "type": "show", "limit": min(PAGE_SIZE, args.limit - offset),
+                      "offset": offset, "market": args.market}
+            results = cache.fetch("search", params, lambda: request("search", **params))
+            page = results.get("shows", {})
+            shows = [show for show in page.get("items", []) if show]
+            for show in shows:
+                if not pipeline.match_metadata(show):
+                    continue
+                episodes = []
+                if args.episodes or pipeline.needs_episodes:
+                    episode_params = {"id": show["id"], "limit": args.max_episodes}
+                    episodes = cache.fetch(
+                        "show_episodes", episode_params,
+                        lambda: request("show_episodes", show_id=show["id"], limit=args.max_episodes)
+                    ).get("items", [])
+                    episodes = [ep for ep in episodes if ep and ep.get("name") and ep.get("release_date")]
+                last_date = latest_release_date(episodes)
+                if not pipeline.match_episodes(last_date):
+                    continue
+                found += 1
+                console.podcast(show, last_date, episodes if args.episodes else None)
+                if output:
+                    output.write({"show": show, "episodes": episodes})
+            if not shows or not page.get("next"):
+                break
+    except CacheMiss as e:
+        console.error(f"[bold red]{e} : relancez sans --cache-only.[/bold red]")
+        return 1
+    finally:
+        if output:
+            output.close()
+        cache.close()
+
+    print_rejections(console, pipeline)
+    console.print(f"🎯 {found} podcasts retenus pour « {query} »")
+    if output:
+        console.print(f"[green]Résultats exportés dans :[/green] [blue]{args.output}[/blue]")
+    return 0
+
+
+def cmd_refilter(args, console):
+    from podcast_filters import FilterPipeline, print_rejections
+    from jsonl_io import JsonlWriter
+
+    filters = filters_from_args(args)
+    pipeline = FilterPipeline(filters)
+    entries = read_entries(args, console, filters, "filtered_results")
+
+    with JsonlWriter(args.output) as output:
+        for record, show, _, last_date in select_entries(entries, pipeline):
+            console.podcast(show, last_date)
+            output.write(record)
+
+    print_rejections(console, pipeline)
+    console.print(
+        f"[green]Résultats exportés dans :[/green] [blue]{args.output}[/blue] "
+        f"({output.count} podcasts filtrés sur {pipeline.rejections['checked']})"
+    )
+    return 0
+
+
+def load_markets():
+    # Marchés de chaque podcast notés par une collecte multi-marchés (show_markets.jsonl)
+    from jsonl_io import find_input, iter_records
+
+    path = find_input("show_markets")
+    if not os.path.exists(path):
+        return {}
+    return {record["id"]: record["markets"] for record in iter_records(path)}
+
+
+def cmd_export(args, console):
+    from podcast_filters import FilterPipeline
+    from columnar import (
+        ARROW_SUFFIXES, EPISODE_COLUMNS, SHOW_COLUMNS, ColumnarWriter, episode_rows, episodes_path, has_pyarrow, show_row
+    )
+    from jsonl_io import JsonlWriter
+
+    output_path = args.output
+    if output_path.endswith(ARROW_SUFFIXES) and not has_pyarrow():
+        output_path = os.path.splitext(output_path)[0] + ".csv"
+        console.print(f"[yellow]pyarrow n’est pas installé : export CSV dans {output_path}[/yellow]")
+
+    def open_writer(path, columns):
+        if ".jsonl" in path:
+            return JsonlWriter(path)
+        return ColumnarWriter(path, columns)
+
+    filters = filters_from_args(args)
+    pipeline = FilterPipeline(filters)
+    entries = select_entries(read_entries(args, console, filters, "filtered_results"), pipeline)
+    markets = load_markets()
+    seen = set()
+
+    shows_writer = open_writer(output_path, SHOW_COLUMNS)
+    episodes_writer = open_writer(episodes_path(output_path), EPISODE_COLUMNS) if args.episodes else None
+    try:
+        for _, show, episodes, last_date in entries:
+            if show["id"] in seen:
+                continue
+            seen.add(show["id"])
+            shows_writer.write(show_row(show, last_date, markets.get(show["id"])))
+            if episodes_writer:
+                for row in episode_rows(show["id"], episodes):
+                    episodes_writer.write(row)
+    finally:
+        shows_writer.close()
+        if episodes_writer:
+            episodes_writer.close()
+
+    console.print(f"[green]{shows_writer.count} podcasts exportés dans :[/green] [blue]{output_path}[/blue]")
+    if episodes_writer:
+        console.print(f"[green]{episodes_writer.count} épisodes exportés dans :[/green] "
+                      f"[blue]{episodes_writer.path}[/blue]")
+    return 0
+
+
+# --- ARGUMENTS ---
+
+def build_parser():
+    from render import add_render_arguments
+    from response_cache import add_cache_arguments
+
+    parser = argparse.ArgumentParser(description="Recherche et filtrage de podcasts Spotify")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="Recherche en ligne via l’API Spotify")
+    search.add_argument("--search", help="Mot-clé de recherche (par défaut : les mots de --title-include)")
+    add_filter_arguments(search)
+    search.add_argument("--episodes", action="store_true", help="Affiche les épisodes récents de chaque podcast")
+    search.add_argument("--limit", type=int, default=10, help="Nombre de résultats à explorer (par défaut : 10)")
+    search.add_argument("--max-episodes", type=int, default=5,
+                        help="Nombre d’épisodes à afficher par podcast (par défaut : 5)")
+    search.add_argument("--market", default="FR", help="Marché Spotify (par défaut : FR)")
+    search.add_argument("--rate", type=float, default=10.0, help="Requêtes par seconde")
+    search.add_argument("--output", help="Enregistre les podcasts retenus dans ce fichier JSONL")
+    add_cache_arguments(search)
+    add_render_arguments(search)
+    search.set_defaults(func=cmd_search)
+
+    refilter = commands.add_parser("refilter", help="Filtre à nouveau des résultats locaux, sans réseau")
+    add_source_arguments(refilter, "filtered_results")
+    add_filter_arguments(refilter)
+    refilter.add_argument("--output", default="refiltered.jsonl", help="Fichier de sortie (par défaut : refiltered.jsonl)")
+    add_render_arguments(refilter)
+    refilter.set_defaults(func=cmd_refilter)
+
+    export = commands.add_parser("export", help="Exporte des résultats locaux en colonnes (Parquet, Arrow, CSV), sans réseau")
+    add_source_arguments(export, "filtered_results")
+    add_filter_arguments(export)
+    export.add_argument("--output", default="podcasts.parquet",
+                        help="Fichier .parquet, .arrow, .csv ou .jsonl[.gz|.zst] (par défaut : podcasts.parquet, "
+                             "CSV si pyarrow est absent)")
+    export.add_argument("--episodes", action="store_true",
+                        help="Exporte aussi les épisodes dans <sortie>.episodes.<format>")
+    add_render_arguments(export)
+    export.set_defaults(func=cmd_export)
+    return parser
+
+
+def main(argv=None):
+    from render import make_output
+
+    args = build_parser().parse_args(argv)
+    console = make_output(args)
+    try:
+        return args.func(args, console)
+    finally:
+        console.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
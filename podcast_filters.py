@@ -0,0 +1,178 @@
+import re
+import threading
+from collections import Counter
+from datetime import date
+
+# --- FILTRES COMPILÉS EN DEUX ÉTAPES ---
+#
+# Le dict `filters` est compilé une seule fois : mots-clés -> une regex par liste,
+# langues -> frozenset, bornes de dates -> chaînes ISO validées (comparées telles quelles).
+# Étape 1 : métadonnées du podcast (aucun appel réseau).
+# Étape 2 : date du dernier épisode (nécessite les épisodes).
+# Dans chaque étape, les prédicats sont triés du moins coûteux au plus coûteux,
+# les plus sélectifs en premier à coût égal.
+
+ISO_DAY = re.compile(r"\d{4}-\d{2}-\d{2}$")
+
+
+def normalize_day(value):
+    # "YYYY-MM-DD" valide ou None (les dates "2019" ou "2019-05" sont rejetées)
+    if not value or not ISO_DAY.match(value):
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        return None
+
+
+def filter_day(filters, name):
+    # Borne de date configurée : une valeur mal formée est une erreur, pas un filtre ignoré
+    value = filters.get(name)
+    if not value:
+        return None
+    day = normalize_day(value)
+    if day is None:
+        raise ValueError(f"{name} : date invalide {value!r} (format attendu : YYYY-MM-DD)")
+    return day
+
+
+def latest_release_date(episodes):
+    dates = [ep.get("release_date") for ep in episodes if ep.get("release_date")]
+    if not dates:
+        return None
+    return max(dates)
+
+
+def record_show(record):
+    # (podcast, date du dernier épisode) d’une entrée {"show", "episodes"} ou d’un podcast brut
+    if "show" in record:
+        return record["show"], record.get("last_episode_date") or latest_release_date(record.get("episodes", []))
+    return record, record.get("last_episode_date")
+
+
+def keyword_pattern(keywords):
+    keywords = {kw.lower() for kw in keywords or [] if kw}
+    if not keywords:
+        return None
+    # Une seule regex par liste, mots-clés les plus longs en premier
+    return re.compile("|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True)))
+
+
+def metadata_predicates(filters):
+    predicates = []
+    title_include = keyword_pattern(filters.get("title_include"))
+    title_exclude = keyword_pattern(filters.get("title_exclude"))
+    desc_include = keyword_pattern(filters.get("desc_include"))
+    desc_exclude = keyword_pattern(filters.get("desc_exclude"))
+    langs = frozenset(lang.lower() for lang in filters.get("lang") or [])
+    explicit = filters.get("explicit")
+    min_episodes = filters.get("min_episodes")
+    max_episodes = filters.get("max_episodes")
+
+    if explicit is not None:
+        predicates.append(("explicit", lambda show: show.get("explicit", None) == explicit))
+    if min_episodes:
+        predicates.append(("min_episodes", lambda show: show.get("total_episodes", 0) >= min_episodes))
+    if max_episodes:
+        predicates.append(("max_episodes", lambda show: show.get("total_episodes", 0) <= max_episodes))
+    if filters.get("only_questions"):
+        predicates.append(("only_questions", lambda show: show["name"].rstrip().endswith("?")))
+    if langs:
+        predicates.append(("lang", lambda show: not langs.isdisjoint(
+            [l.lower() for l in show.get("languages", [])]
+        )))
+    if title_include:
+        predicates.append(("title_include", lambda show: title_include.search(show["name"].lower()) is not None))
+    if title_exclude:
+        predicates.append(("title_exclude", lambda show: title_exclude.search(show["name"].lower()) is None))
+    if desc_include:
+        predicates.append(("desc_include", lambda show: desc_include.search(show["description"].lower()) is not None))
+    if desc_exclude:
+        predicates.append(("desc_exclude", lambda show: desc_exclude.search(show["description"].lower()) is None))
+    return predicates
+
+
+def episode_predicates(filters):
+    predicates = []
+    min_date = filter_day(filters, "last_episode_after")
+    max_date = filter_day(filters, "last_episode_before")
+
+    # `last` est déjà normalisé : les chaînes ISO se comparent dans l’ordre chronologique
+    if min_date:
+        predicates.append(("last_episode_after", lambda last: last is not None and last >= min_date))
+    if max_date:
+        predicates.append(("last_episode_before", lambda last: last is not None and last <= max_date))
+    return predicates
+
+
+class FilterPipeline:
+    def __init__(self, filters):
+        self.metadata = metadata_predicates(filters)
+        self.episodes = episode_predicates(filters)
+        self.rejections = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def needs_episodes(self):
+        return bool(self.episodes)
+
+    def _count(self, name, n=1):
+        with self.lock:
+            self.rejections[name] += n
+
+    def match_metadata(self, show):
+        self._count("checked")
+        for name, predicate in self.metadata:
+            if not predicate(show):
+                self._count(name)
+                return False
+        return True
+
+    def passes_metadata(self, show):
+        # Comme match_metadata, sans toucher aux compteurs de rejets
+        return all(predicate(show) for _, predicate in self.metadata)
+
+    def match_episodes(self, last_episode_date):
+        # last_episode_date : chaîne "YYYY-MM-DD" ou None
+        last = normalize_day(last_episode_date)
+        for name, predicate in self.episodes:
+            if not predicate(last):
+                self._count(name)
+                return False
+        self._count("matched")
+        return True
+
+    def match(self, show, last_episode_date):
+        return self.match_metadata(show) and self.match_episodes(last_episode_date)
+
+    def select(self, shows, last_dates=None):
+        # Version liste : chaque prédicat est appliqué aux survivants du précédent.
+        # Renvoie les indices retenus ; sans `last_dates`, seule l’étape 1 est évaluée.
+        indices = list(range(len(shows)))
+        self._count("checked", len(shows))
+        for name, predicate in self.metadata:
+            kept = [i for i in indices if predicate(shows[i])]
+            self._count(name, len(indices) - len(kept))
+            indices = kept
+        if last_dates is None:
+            return indices
+
+        normalized = {i: normalize_day(last_dates[i]) for i in indices}
+        for name, predicate in self.episodes:
+            kept = [i for i in indices if predicate(normalized[i])]
+            self._count(name, len(indices) - len(kept))
+            indices = kept
+        self._count("matched", len(indices))
+        return indices
+
+    def report(self):
+        # (prédicat, rejets) dans l’ordre d’évaluation
+        names = [name for name, _ in self.metadata + self.episodes]
+        return [(name, self.rejections[name]) for name in names]
+
+
+def print_rejections(output, pipeline, title="Rejets par filtre"):
+    columns = [("Filtre", "left"), ("Rejetés", "right")]
+    rows = [[name, count] for name, count in pipeline.report()]
+    rows.append(["[bold]retenus[/bold]", f"[bold]{pipeline.rejections['matched']}[/bold]"])
+    output.table(title, columns, rows, f"{pipeline.rejections['checked']} podcasts évalués")
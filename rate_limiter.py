@@ -0,0 +1,60 @@
+import threading
+import time
+
+# --- LIMITEUR DE DÉBIT PARTAGÉ ---
+
+# Seau à jetons partagé entre threads : `rate` requêtes/s, rafales jusqu'à `capacity`
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waited = 0.0      # secondes passées à attendre un jeton
+        self.backoffs = 0      # suspensions déclenchées par un 429
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    elapsed = now - self.updated
+                    self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+            time.sleep(wait)
+
+    def backoff(self, delay):
+        # Bloque tous les workers et vide le seau : la reprise se fait sans rafale
+        with self.lock:
+            self.backoffs += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self.updated = self.blocked_until
+            self.tokens = 0.0
+
+
+def retry_after(error, default):
+    headers = getattr(error, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After", default))
+    except (TypeError, ValueError):
+        return default
+
+
+def call_with_backoff(bucket, func, *args, max_retries=5, **kwargs):
+    for attempt in range(max_retries + 1):
+        bucket.acquire()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if getattr(e, "http_status", None) != 429 or attempt == max_retries:
+                raise
+            bucket.backoff(retry_after(e, default=2 ** attempt))
@@ -0,0 +1,223 @@
+import re
+import sys
+import json
+import queue
+import threading
+
+# --- AFFICHAGE ---
+#
+# Quatre modes, même interface (print, log, error, rule, podcast, table, close) :
+#   panels : rendu rich différé — les messages passent par une file bornée qu’un thread
+#            dédié affiche par lots ; la boucle réseau ne fait qu’empiler.
+#   table  : rich, un seul tableau paginé des podcasts retenus en fin d’exécution.
+#   quiet  : aucun import de rich, seuls les messages de bilan (et les erreurs, sur stderr)
+#            sont écrits.
+#   json   : aucun import de rich, un objet JSON par ligne sur stdout (podcasts, tableaux),
+#            messages lisibles sur stderr.
+
+MARKUP = re.compile(r"\[/?(?:bold|dim|italic|red|green|blue|yellow|cyan|magenta)?(?: [a-z]+)*\]")
+
+QUEUE_SIZE = 1000
+BATCH_SIZE = 50
+TABLE_PAGE = 50
+
+
+def plain(text):
+    return MARKUP.sub("", str(text))
+
+
+def podcast_fields(show, last_date):
+    return {
+        "name": show['name'],
+        "publisher": show.get('publisher', ''),
+        "languages": ', '.join(show.get('languages', [])),
+        "total_episodes": show.get('total_episodes'),
+        "explicit": show.get('explicit'),
+        "last_date": last_date or 'N/A',
+        "url": show.get('external_urls', {}).get('spotify', ''),
+    }
+
+
+class RichOutput:
+    def __init__(self, mode="panels"):
+        from rich.console import Console
+
+        self.mode = mode
+        self.console = Console(log_path=False)
+        self.rows = []
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.consumer = threading.Thread(target=self._consume, daemon=True)
+        self.consumer.start()
+
+    def _consume(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Un seul write terminal par lot ; un rendu en échec ne doit ni arrêter ce thread
+            # ni bloquer flush() et les producteurs
+            try:
+                with self.console:
+                    for item in batch:
+                        if item is not None:
+                            self._render(item)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if None in batch:
+                return
+
+    def _render(self, item):
+        try:
+            item()
+        except Exception as e:
+            sys.stderr.write(f"Erreur d’affichage : {e}\n")
+
+    def _defer(self, func, *args, **kwargs):
+        self.queue.put(lambda: func(*args, **kwargs))
+
+    def print(self, *objects, **kwargs):
+        self._defer(self.console.print, *objects, **kwargs)
+
+    def log(self, *objects, **kwargs):
+        self._defer(self.console.log, *objects, **kwargs)
+
+    def error(self, *objects, **kwargs):
+        self._defer(self.console.log, *objects, **kwargs)
+
+    def rule(self, title=""):
+        self._defer(self.console.rule, title)
+
+    def podcast(self, show, last_date=None, episodes=None):
+        if self.mode == "table":
+            self.rows.append(podcast_fields(show, last_date))
+            return
+        self._defer(self._panel, show, last_date, episodes)
+
+    def _panel(self, show, last_date, episodes):
+        from rich.panel import Panel
+        from rich.markup import escape
+
+        description = escape(show['description'][:200]) + "..."
+        listing = "".join(
+            f"\n[dim]{ep.get('release_date', '')}[/dim] {escape(ep.get('name', ''))}" for ep in episodes or []
+        )
+        if listing:
+            listing = "\n" + listing
+        panel = Panel.fit(
+            f"[bold yellow]{escape(show['name'])}[/bold yellow]\n"
+            f"[green]Publisher:[/green] {escape(show['publisher'])}\n"
+            f"[cyan]Langues:[/cyan] {', '.join(show.get('languages', []))}\n"
+            f"[cyan]Episodes:[/cyan] {show['total_episodes']} | Explicite: {show['explicit']}\n"
+            f"[cyan]Dernier épisode :[/cyan] {last_date or 'N/A'}\n\n"
+            f"{description}\n\n"
+            f"[blue]{show['external_urls']['spotify']}[/blue]"
+            f"{listing}",
+            title="🎙️ Podcast",
+            border_style="magenta"
+        )
+        self.console.print(panel)
+
+    def table(self, title, columns, rows, caption=None):
+        self._defer(self._table, title, columns, rows, caption)
+
+    def _table(self, title, columns, rows, caption):
+        from rich.table import Table
+
+        table = Table(title=title, caption=caption)
+        for name, justify in columns:
+            table.add_column(name, justify=justify)
+        for row in rows:
+            table.add_row(*[str(value) for value in row])
+        self.console.print(table)
+
+    def _podcast_tables(self, rows):
+        from rich.markup import escape
+
+        columns = [("Podcast", "left"), ("Publisher", "left"), ("Langues", "left"),
+                   ("Épisodes", "right"), ("Explicite", "left"), ("Dernier épisode", "left"), ("Lien", "left")]
+        pages = -(-len(rows) // TABLE_PAGE)
+        for page in range(pages):
+            chunk = rows[page * TABLE_PAGE:(page + 1) * TABLE_PAGE]
+            self._table(
+                f"🎙️ Podcasts retenus ({page + 1}/{pages})", columns,
+                [[escape(str(value)) for value in fields.values()] for fields in chunk], None
+            )
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        if self.mode == "table" and self.rows:
+            self._defer(self._podcast_tables, self.rows)
+            self.rows = []
+        self.queue.put(None)
+        self.consumer.join()
+
+
+class PlainOutput:
+    def __init__(self, mode="quiet"):
+        self.mode = mode
+        self.lock = threading.Lock()
+
+    def _write(self, text, stream):
+        with self.lock:
+            stream.write(text + "\n")
+
+    def print(self, *objects, **kwargs):
+        text = " ".join(plain(obj) for obj in objects)
+        self._write(text, sys.stderr if self.mode == "json" else sys.stdout)
+
+    def log(self, *objects, **kwargs):
+        if self.mode == "json":
+            self.print(*objects)
+
+    def error(self, *objects, **kwargs):
+        # Toujours sur stderr, même en mode quiet : une collecte en cron ne doit pas échouer en silence
+        self._write(" ".join(plain(obj) for obj in objects), sys.stderr)
+
+    def rule(self, title=""):
+        if self.mode == "json":
+            self.print(f"--- {plain(title)} ---")
+
+    def podcast(self, show, last_date=None, episodes=None):
+        if self.mode == "json":
+            record = {"type": "podcast", "show": show, "last_episode_date": last_date}
+            if episodes is not None:
+                record["episodes"] = episodes
+            self._write(json.dumps(record, ensure_ascii=False), sys.stdout)
+
+    def table(self, title, columns, rows, caption=None):
+        if self.mode == "json":
+            record = {
+                "type": "table",
+                "title": plain(title),
+                "columns": [name for name, _ in columns],
+                "rows": [[plain(value) if isinstance(value, str) else value for value in row] for row in rows],
+                "caption": plain(caption) if caption else None,
+            }
+            self._write(json.dumps(record, ensure_ascii=False), sys.stdout)
+
+    def flush(self):
+        sys.stdout.flush()
+
+    def close(self):
+        self.flush()
+
+
+def add_render_arguments(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--quiet", action="store_true", help="Sans affichage rich : bilan minimal (cron, CI)")
+    group.add_argument("--json", action="store_true", help="Sans affichage rich : une ligne JSON par podcast retenu")
+    group.add_argument("--table", action="store_true", help="Un tableau paginé des podcasts retenus en fin d’exécution")
+
+
+def make_output(args):
+    if args.quiet:
+        return PlainOutput("quiet")
+    if args.json:
+        return PlainOutput("json")
+    return RichOutput("table" if args.table else "panels")
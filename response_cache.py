@@ -0,0 +1,138 @@
+import json
+import time
+import zlib
+import hashlib
+from sqlite_store import SqliteStore
+
+# --- CACHE DISQUE DES RÉPONSES SPOTIFY ---
+
+DEFAULT_PATH = "spotify_cache.sqlite"
+
+# Durées de vie (secondes) par endpoint
+DEFAULT_TTLS = {
+    "search": 3 * 24 * 3600,
+    "show_episodes": 12 * 3600,
+    "show": 3 * 24 * 3600
+}
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+MODES = ("normal", "cache_only", "refresh")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at);
+"""
+
+
+class CacheMiss(Exception):
+    pass
+
+
+def cache_key(endpoint, params):
+    raw = json.dumps([endpoint, params], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(SqliteStore):
+    def __init__(self, path=DEFAULT_PATH, mode="normal", ttls=None, max_bytes=DEFAULT_MAX_BYTES):
+        if mode not in MODES:
+            raise ValueError(f"Mode de cache inconnu : {mode}")
+        self.mode = mode
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+        # Une validation par écriture : chaque réponse mise en cache est durable aussitôt
+        super().__init__(path, SCHEMA, commit_every=1)
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, endpoint, params):
+        key = cache_key(endpoint, params)
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            payload, created_at = row
+            if now - created_at > self.ttls.get(endpoint, 0):
+                self.stats["expired"] += 1
+                return None
+            self.db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._written()
+            self.stats["hits"] += 1
+        return json.loads(zlib.decompress(payload))
+
+    def put(self, endpoint, params, response):
+        key = cache_key(endpoint, params)
+        payload = zlib.compress(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+        now = time.time()
+        with self.lock:
+            old = self.db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, payload, len(payload), now, now)
+            )
+            self.total_bytes += len(payload) - (old[0] if old else 0)
+            self.stats["stores"] += 1
+            self._evict()
+            self._written()
+
+    def _evict(self):
+        # Éviction LRU jusqu'à repasser sous la taille maximale
+        while self.total_bytes > self.max_bytes:
+            rows = self.db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.stats["evictions"] += 1
+
+    def fetch(self, endpoint, params, func):
+        if self.mode != "refresh":
+            cached = self.get(endpoint, params)
+            if cached is not None:
+                return cached
+        if self.mode == "cache_only":
+            raise CacheMiss(f"{endpoint} {params} absent du cache")
+        response = func()
+        self.put(endpoint, params, response)
+        return response
+
+    def summary(self):
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["expired"]
+        ratio = self.stats["hits"] / lookups if lookups else 0.0
+        return (
+            f"Cache : {self.stats['hits']} hits, {self.stats['misses']} misses, "
+            f"{self.stats['expired']} expirés, {self.stats['stores']} écritures, "
+            f"{self.stats['evictions']} évictions ({ratio:.0%} de hits)"
+        )
+
+
+def add_cache_arguments(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--cache-only", action="store_true", help="N’utilise que le cache local (aucun appel API)")
+    group.add_argument("--refresh", action="store_true", help="Ignore le cache en lecture et le met à jour")
+    parser.add_argument("--cache-path", default=DEFAULT_PATH, help="Fichier SQLite du cache")
+
+
+def cache_mode(args):
+    if args.cache_only:
+        return "cache_only"
+    if args.refresh:
+        return "refresh"
+    return "normal"
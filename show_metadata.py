@@ -0,0 +1,44 @@
+# --- MÉTADONNÉES DE PODCASTS PAR LOTS ---
+
+# Limite de l’endpoint GET /shows (sp.shows)
+SHOWS_BATCH_SIZE = 50
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def fetch_shows(request, show_ids, market=None, cache=None, on_error=None):
+    # request(ids) doit renvoyer la réponse brute de sp.shows(ids, market=...).
+    # Avec on_error(lot, exception), un lot en échec est signalé puis ignoré : ses podcasts
+    # sont absents du résultat et l’appelant garde les métadonnées qu’il avait déjà.
+    shows = {}
+    pending = []
+    for show_id in dict.fromkeys(show_ids):
+        cached = cache.get("show", {"id": show_id, "market": market}) if cache and cache.mode != "refresh" else None
+        if cached is not None:
+            shows[show_id] = cached
+        else:
+            pending.append(show_id)
+
+    if cache and cache.mode == "cache_only":
+        return shows
+
+    for chunk in chunked(pending, SHOWS_BATCH_SIZE):
+        try:
+            response = request(chunk)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(chunk, e)
+            continue
+        for show in response.get("shows", []):
+            # Spotify renvoie null pour les podcasts indisponibles sur le marché
+            if not show:
+                continue
+            shows[show["id"]] = show
+            if cache:
+                cache.put("show", {"id": show["id"], "market": market}, show)
+
+    return shows
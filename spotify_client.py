@@ -0,0 +1,137 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import spotipy
+from spotipy.cache_handler import CacheFileHandler
+from spotipy.oauth2 import SpotifyClientCredentials
+from dotenv import load_dotenv
+from metrics import InstrumentedClient
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+# --- CLIENT SPOTIFY PARTAGÉ ---
+#
+# Une seule session requests par processus : pool urllib3 dimensionné pour les threads
+# de collecte, connexions keep-alive (une poignée de main TLS par connexion, pas par requête)
+# et réessais HTTP sur les erreurs serveur. Le jeton client-credentials est gardé en mémoire
+# et partagé sur disque entre processus : un verrou de fichier garantit qu’un seul processus
+# le renouvelle quand il expire, les autres relisent celui qu’il vient d’écrire.
+
+TOKEN_CACHE_PATH = ".cache"       # emplacement par défaut de spotipy
+POOL_SIZE = 16
+RETRY_STATUSES = (500, 502, 503, 504)
+REQUESTS_TIMEOUT = 10
+
+
+@contextmanager
+def file_lock(path):
+    # Verrou exclusif inter-processus sur un fichier annexe
+    with open(path, "a+") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class AtomicTokenCache(CacheFileHandler):
+    # Écriture atomique : un lecteur concurrent ne voit jamais un fichier à moitié écrit
+    def save_token_to_cache(self, token_info):
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(token_info, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.cache_path)
+
+
+class SharedClientCredentials(SpotifyClientCredentials):
+    def __init__(self, *args, token_cache=TOKEN_CACHE_PATH, **kwargs):
+        super().__init__(*args, cache_handler=AtomicTokenCache(token_cache), **kwargs)
+        self.lock_path = f"{token_cache}.lock"
+        self.memory_token = None
+        self.memory_lock = threading.Lock()
+
+    def get_access_token(self, as_dict=False, check_cache=True):
+        # spotipy l’appelle avant chaque requête : pas d’accès disque tant que le jeton est valide
+        token_info = self.memory_token
+        if token_info is None or self.is_token_expired(token_info):
+            with self.memory_lock:
+                token_info = self.memory_token
+                if token_info is None or self.is_token_expired(token_info):
+                    token_info = self._shared_token(check_cache)
+                    self.memory_token = token_info
+        return token_info if as_dict else token_info["access_token"]
+
+    def _shared_token(self, check_cache):
+        with file_lock(self.lock_path):
+            token_info = self.cache_handler.get_cached_token() if check_cache else None
+            if token_info and not self.is_token_expired(token_info):
+                return token_info
+            token_info = self._add_custom_values_to_token_info(self._request_access_token())
+            self.cache_handler.save_token_to_cache(token_info)
+            return token_info
+
+
+class StatusRetry(Retry):
+    # urllib3 réessaie aussi tout 429 porteur de Retry-After, même hors status_forcelist :
+    # sans 429 dans la liste, la réponse doit remonter (avec ses en-têtes) jusqu’au limiteur
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429 and 429 not in (self.status_forcelist or ()):
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def make_session(pool_size=POOL_SIZE, status_forcelist=RETRY_STATUSES, status_retries=3):
+    session = requests.Session()
+    retry = StatusRetry(
+        total=status_retries + 2,
+        connect=2,
+        read=False,
+        status=status_retries,
+        backoff_factor=0.3,
+        allowed_methods=frozenset(["GET", "POST"]),
+        status_forcelist=status_forcelist,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+def connect(pool_size=POOL_SIZE, status_forcelist=RETRY_STATUSES, status_retries=3, token_cache=TOKEN_CACHE_PATH):
+    # Point de remplacement du faux client des benchmarks
+    load_dotenv()
+    session = make_session(pool_size, status_forcelist, status_retries)
+    auth_manager = SharedClientCredentials(
+        client_id=os.getenv("SPOTIFY_CLIENT_ID"),
+        client_secret=os.getenv("SPOTIFY_CLIENT_SECRET"),
+        requests_session=session,
+        requests_timeout=REQUESTS_TIMEOUT,
+        token_cache=token_cache,
+    )
+    return spotipy.Spotify(auth_manager=auth_manager, requests_session=session, requests_timeout=REQUESTS_TIMEOUT)
+
+
+def create_client(metrics=None, pool_size=POOL_SIZE, retry_429=False, token_cache=TOKEN_CACHE_PATH):
+    # Sans retry_429, un 429 remonte avec son Retry-After jusqu’au limiteur (call_with_backoff)
+    status_forcelist = RETRY_STATUSES + (429,) if retry_429 else RETRY_STATUSES
+    client = connect(pool_size=pool_size, status_forcelist=status_forcelist, token_cache=token_cache)
+    return client if metrics is None else InstrumentedClient(client, metrics)
@@ -0,0 +1,39 @@
+import threading
+
+# --- BASE SQLITE PARTAGÉE ---
+#
+# Connexion unique partagée par les threads (verrou), WAL + synchronous=NORMAL, schéma
+# créé à l’ouverture et écritures validées par lots de `commit_every`.
+
+
+class SqliteStore:
+    def __init__(self, path, schema, commit_every=500):
+        self.path = path
+        self.commit_every = commit_every
+        self.pending = 0
+        # Import différé : les modules qui en dépendent restent légers à importer (options CLI)
+        import sqlite3
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(schema)
+        self.db.commit()
+
+    def _written(self):
+        # À appeler sous self.lock après chaque écriture
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.db.commit()
+            self.pending = 0
+
+    def commit(self):
+        with self.lock:
+            self.db.commit()
+            self.pending = 0
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
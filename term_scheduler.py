@@ -0,0 +1,211 @@
+import re
+import threading
+from collections import Counter
+from pagination import MAX_OFFSET, PAGE_SIZE, TermPager
+
+# --- ORDONNANCEMENT ADAPTATIF DES TERMES ---
+#
+# Chaque (marché, terme) avance page par page, mais l’ordre des pages n’est plus fixé à
+# l’avance : la page suivante est prise sur le terme au meilleur rendement récent
+# (moyenne exponentielle des podcasts nouveaux passant les filtres de métadonnées, par
+# requête). Chaque terme est d’abord sondé une fois ; avec un budget de requêtes, ce sondage
+# est limité à PROBE_SHARE du budget : au-delà, un terme non sondé est mis en concurrence
+# avec les autres au rendement moyen des termes déjà sondés, et les termes stériles ne
+# sont plus servis. Option : des mots fréquents dans les titres retenus deviennent de
+# nouveaux termes.
+
+DECAY = 0.5             # poids de la dernière page dans le rendement récent
+PROBE_SHARE = 0.5       # part maximale du budget consacrée aux premières pages
+MINED_MIN_COUNT = 2     # occurrences dans les titres retenus avant d’essayer un mot
+MINED_WORD = re.compile(r"[^\W\d_]{4,}")
+STOPWORDS = frozenset("""
+    about after again also back been best from have here into just like make more most much
+    only other over show some than that their them then there these they this those through
+    very were what when where which while will with your podcast episode episodes avec dans
+    pour plus sans sont tout tous vous nous leur mais cette comme
+""".split())
+
+
+class TermState:
+    def __init__(self, market, term, key, pager, mined=False):
+        self.market = market
+        self.term = term
+        self.key = key
+        self.pager = pager
+        self.mined = mined
+        self.offset = 0
+        self.total = MAX_OFFSET    # `shows.total` de la dernière page reçue
+        self.requests = 0
+        self.candidates = 0     # podcasts nouveaux passant les filtres de métadonnées
+        self.matched = 0        # podcasts finalement retenus (épisodes compris)
+        self.score = 0.0
+        self.in_flight = False
+        self.done = False
+
+
+class TermScheduler:
+    def __init__(self, markets, terms, journal, key, min_new_ratio, patience,
+                 budget=None, mine_terms=0, decay=DECAY):
+        self.markets = markets
+        self.journal = journal
+        self.key = key
+        self.min_new_ratio = min_new_ratio
+        self.patience = patience
+        self.budget = budget
+        self.mine_terms = mine_terms
+        self.decay = decay
+        self.states = {}
+        self.requests = 0
+        self.probes = 0
+        self.evaluating = 0     # podcasts en cours d’évaluation (source des termes extraits)
+        self.words = Counter()
+        self.mined = []
+        self.cond = threading.Condition()
+        for term in terms:
+            self._add(term)
+
+    def _add(self, term, mined=False):
+        for market in self.markets:
+            key = self.key(market, term)
+            if key not in self.states:
+                pager = TermPager(self.min_new_ratio, self.patience)
+                self.states[key] = TermState(market, term, key, pager, mined)
+
+    def _skip_done(self, state):
+        # Reprise : pages déjà journalisées et pagination déjà close
+        end = self.journal.term_end(state.key)
+        while state.offset < MAX_OFFSET and self.journal.is_page_done(state.key, state.offset):
+            state.offset += PAGE_SIZE
+        if state.offset >= MAX_OFFSET or (end is not None and state.offset >= end):
+            state.done = True
+
+    def _probing(self):
+        return self.budget is None or self.probes < self.budget * PROBE_SHARE
+
+    def _prior(self):
+        # Rendement supposé d’un terme non sondé une fois la phase de sondage close
+        scores = [state.score for state in self.states.values() if state.requests]
+        return sum(scores) / len(scores) if scores else 0.0
+
+    def _priority(self, state, probing, prior):
+        # Termes jamais sondés d’abord (ordre d’ajout) tant que le sondage est ouvert,
+        # puis meilleur rendement récent
+        if state.requests == 0:
+            return (probing, prior)
+        return (False, state.score)
+
+    def next_page(self):
+        # Bloque tant que des pages ou, avec l’extraction de termes, des évaluations en cours
+        # peuvent encore rouvrir un terme ; None à la fin
+        with self.cond:
+            while True:
+                if self.budget is not None and self.requests >= self.budget:
+                    return None
+                ready = []
+                for state in self.states.values():
+                    if not state.done and not state.in_flight:
+                        self._skip_done(state)
+                        if not state.done:
+                            ready.append(state)
+                if ready:
+                    probing = self._probing()
+                    prior = 0.0 if probing else self._prior()
+                    state = max(ready, key=lambda s: self._priority(s, probing, prior))
+                    state.in_flight = True
+                    self.requests += 1
+                    if state.requests == 0:
+                        self.probes += 1
+                    return state
+                if not any(state.in_flight for state in self.states.values()) and not self._mining():
+                    return None
+                self.cond.wait()
+
+    def _mining(self):
+        # Des évaluations en cours peuvent encore ajouter un terme à chercher
+        return self.evaluating > 0 and len(self.mined) < self.mine_terms
+
+    def evaluation_started(self):
+        with self.cond:
+            self.evaluating += 1
+
+    def evaluation_done(self):
+        with self.cond:
+            self.evaluating -= 1
+            if self.evaluating == 0:
+                self.cond.notify_all()
+
+    def page_done(self, state, candidates, rule=None, total=MAX_OFFSET):
+        with self.cond:
+            state.total = total
+            state.requests += 1
+            state.candidates += candidates
+            if state.requests == 1:
+                state.score = float(candidates)
+            else:
+                state.score = self.decay * candidates + (1 - self.decay) * state.score
+            state.offset += PAGE_SIZE
+            state.in_flight = False
+            state.done = rule is not None
+            self.cond.notify_all()
+
+    def page_failed(self, state):
+        with self.cond:
+            state.in_flight = False
+            state.done = True
+            self.cond.notify_all()
+
+    def exhausted(self):
+        # Termes entamés mais encore ouverts quand le budget est épuisé
+        with self.cond:
+            return [state for state in self.states.values() if state.requests and not state.done]
+
+    def matched(self, state, title):
+        # Podcast retenu : crédité au terme qui l’a trouvé ; ses mots alimentent l’extraction.
+        # Renvoie les nouveaux termes ajoutés.
+        with self.cond:
+            state.matched += 1
+            if len(self.mined) >= self.mine_terms:
+                return []
+            known = {s.term.lower() for s in self.states.values()}
+            added = []
+            for word in set(MINED_WORD.findall(title.lower())):
+                if word in STOPWORDS or word in known:
+                    continue
+                self.words[word] += 1
+                if self.words[word] >= MINED_MIN_COUNT and len(self.mined) < self.mine_terms:
+                    self.add_mined(word)
+                    added.append(word)
+            if added:
+                self.cond.notify_all()
+            return added
+
+    def add_mined(self, term):
+        with self.cond:
+            if term in self.mined:
+                return
+            self.mined.append(term)
+            self._add(term, mined=True)
+
+    def report(self):
+        return sorted(self.states.values(), key=lambda s: (s.matched, s.candidates), reverse=True)
+
+
+def print_yield(output, scheduler, limit=15):
+    columns = [
+        ("Terme", "left"), ("Requêtes", "right"), ("Candidats", "right"),
+        ("Retenus", "right"), ("Retenus / requête", "right"),
+    ]
+    states = [state for state in scheduler.report() if state.requests]
+    rows = []
+    for state in states[:limit]:
+        label = state.term if len(scheduler.markets) == 1 else f"{state.term} ({state.market})"
+        if state.mined:
+            label += " *"
+        rows.append([label, state.requests, state.candidates, state.matched, f"{state.matched / state.requests:.2f}"])
+    requests = sum(state.requests for state in states)
+    matched = sum(state.matched for state in states)
+    caption = (
+        f"{matched} retenus pour {requests} requêtes de recherche"
+        f" ({matched / max(1, requests):.2f} par requête) ; * : terme extrait des titres"
+    )
+    output.table("Rendement par terme", columns, rows, caption)